@@ -1,27 +1,50 @@
 from dash import dcc, html, Input, Output, State, dash_table, ctx
 import dash_bootstrap_components as dbc
 import pandas as pd
-import io
-import base64
-from datasets import load_dataset
-from deep_translator import GoogleTranslator
 import dash
-from metrics.sentiment import SentimentAnalyzer
-from metrics.toxicity import ToxicityAnalyzer
-from metrics.prompt_analyses import PromptAnalyzer
-from metrics.refusal import RefusalAnalyzer
-from metrics.topics import TopicsAnalyzer
-from metrics.patterns import RegexAnalyzer
-from metrics.pii import PIIAnalyzer
-from metrics.textstat import TextStatAnalyzer
-from presidio_analyzer import AnalyzerEngine
-import plotly.express as px
-import time
+import flask
+import os
+from jobs import JobManager
+from results_store import ResultStore
+from ingestion import iter_hf_chunks, iter_upload_chunks
+from metrics.cache import get_cache
+from metrics.embeddings import stores_stats
+from metrics.instrumentation import render_prometheus
+from metrics.pattern_engine import TIMED_OUT
+from metrics.registry import get_analyzer, is_loaded, loaded_stats
+from pipeline import Pipeline
+from lazy import lazy_import
+from warmup import WARMUP_ANALYZERS, Warmup, parse_names
 import dash_bootstrap_components as dbc
 from collections import Counter
 import dash_tour_component
 
-analyzer = AnalyzerEngine()
+# O plotly só é carregado quando o primeiro gráfico de resultados é montado
+px = lazy_import('plotly.express')
+
+# Entidades oferecidas na aba de reconhecimento de entidades, por grupo
+ENTITY_GROUPS = {
+    'Documents': ["US_DRIVER_LICENSE", "AU_ABN", "AU_ACN", "AU_TFN", "IN_PAN", "IN_VEHICLE_REGISTRATION"],
+    'Others': ["PHONE_NUMBER", "DATE_TIME", "MEDICAL_LICENSE", "EMAIL_ADDRESS", "ORGANIZATION", "URL", "CRYPTO", "UK_NHS", "BAN_CODE"],
+    'Credit Cards': ["CREDIT_CARD", "US_ITIN", "US_BANK_NUMBER", "AU_TFN", "IBAN_CODE"],
+    'Personal Identification': ['PERSON', 'EMAIL_ADDRESS', 'PHONE_NUMBER'],
+    'Location': ['LOCATION', 'IP_ADDRESS']
+}
+
+
+# Mesma ordem dos checklists no callback da aba (identificação, cartões, localização, documentos, outros),
+# para que a seleção padrão tenha a mesma chave no cache de resultados
+def combine_entities(identification_entities, credit_cards_entities, location_entities, documents_entities, others_entities):
+    return identification_entities + credit_cards_entities + location_entities + documents_entities + others_entities
+
+
+DEFAULT_SELECTED_ENTITIES = combine_entities(*(
+    sorted(ENTITY_GROUPS[group]) for group in ('Personal Identification', 'Credit Cards', 'Location', 'Documents', 'Others')
+))
+
+
+def parse_topics(topics_input):
+    return [topic.strip() for topic in topics_input.split(',')] if topics_input else None
 
 
 # Initialize the app
@@ -263,6 +286,14 @@ app.layout = html.Div([
                 html.Button('Process', id='process-button', n_clicks=0, style={'width': '100%'}),
             ], width=12),
         ], style={'marginTop': '20px', "marginBottom": "20px"}),
+        # Roda todas as análises em uma única passada pelo dataset; cada aba passa a mostrar a tabela combinada
+        dbc.Row([
+            dbc.Col([
+                html.Button('Analyze Everything', id='all-process-button', n_clicks=0, style={'width': '100%'}),
+                dbc.Progress(id="all-progress", striped=True, animated=True, style={"marginTop": "20px", "display": "none"}),
+                html.Div(id="all-time-estimate", style={'marginTop': '10px', 'fontSize': '14px'}),
+            ], width=12),
+        ], style={"marginBottom": "20px"}),
         dcc.Loading(id="loading", type="circle", children=[html.Div(id='output-data-upload', style={'marginTop': '5px'})]),
         dcc.Store(id='stored-dataframe'),
         dcc.Store(id='sentiment-results'),
@@ -273,17 +304,33 @@ app.layout = html.Div([
         dcc.Store(id='patterns-results'),
         dcc.Store(id='entity-results'),
         dcc.Store(id='textstat-results'),
+        dcc.Store(id='all-results'),
+        # Últimos tópicos e entidades escolhidos nas abas, usados também pelo "Analyze Everything"
+        dcc.Store(id='topics-selection'),
+        dcc.Store(id='entity-selection', data=DEFAULT_SELECTED_ENTITIES),
         dcc.Store(id='dataset-loaded', data=False),  # Store para verificar se o dataset foi carregado
 
-        # Interval for progress tracking
-        dcc.Interval(id="progress-interval", n_intervals=0, interval=2000, disabled=True),  # Intervalo ajustado para 1000ms (1 segundo)
-        dcc.Interval(id="sentiment-progress-interval", n_intervals=0, interval=2000, disabled=True),
-        dcc.Interval(id="prompt-progress-interval", n_intervals=0, interval=2500, disabled=True),
-        dcc.Interval(id="refusal-progress-interval", n_intervals=0, interval=2000, disabled=True),
-        dcc.Interval(id="topics-progress-interval", n_intervals=0, interval=4000, disabled=True), 
-        dcc.Interval(id="patterns-progress-interval", n_intervals=0, interval=2500, disabled=True), 
-        dcc.Interval(id="entity-progress-interval", n_intervals=0, interval=3000, disabled=True),
-        dcc.Interval(id="textstat-progress-interval", n_intervals=0, interval=3000, disabled=True), 
+        # Stores com o id do job de cada análise em andamento
+        dcc.Store(id='toxicity-job'),
+        dcc.Store(id='sentiment-job'),
+        dcc.Store(id='prompt-job'),
+        dcc.Store(id='refusal-job'),
+        dcc.Store(id='topics-job'),
+        dcc.Store(id='patterns-job'),
+        dcc.Store(id='entity-job'),
+        dcc.Store(id='textstat-job'),
+        dcc.Store(id='all-job'),
+
+        # Interval for progress tracking (apenas consulta o progresso do job no servidor)
+        dcc.Interval(id="progress-interval", n_intervals=0, interval=1000, disabled=True),
+        dcc.Interval(id="sentiment-progress-interval", n_intervals=0, interval=1000, disabled=True),
+        dcc.Interval(id="prompt-progress-interval", n_intervals=0, interval=1000, disabled=True),
+        dcc.Interval(id="refusal-progress-interval", n_intervals=0, interval=1000, disabled=True),
+        dcc.Interval(id="topics-progress-interval", n_intervals=0, interval=1000, disabled=True),
+        dcc.Interval(id="patterns-progress-interval", n_intervals=0, interval=1000, disabled=True),
+        dcc.Interval(id="entity-progress-interval", n_intervals=0, interval=1000, disabled=True),
+        dcc.Interval(id="textstat-progress-interval", n_intervals=0, interval=1000, disabled=True),
+        dcc.Interval(id="all-progress-interval", n_intervals=0, interval=1000, disabled=True),
 
         # Sidebar for navigation
         dbc.Row([
@@ -441,11 +488,11 @@ app.layout = html.Div([
                                 dbc.CardHeader(html.H5(html.B('Topics'))),
                                 dbc.CardBody([
                                     html.P('The Topics Analysis tool performs topic modeling on the dataset, effectively categorizing text into various topics based on content similarity. This allows for a better understanding of the main subjects discussed within the dataset. Users have the flexibility to either specify a list of topics they are interested in or let the system automatically determine the most relevant topics.'),
-                                    html.P('The tool utilizes the "MoritzLaurer/mDeBERTa-v3-base-xnli-multilingual-nli-2mil7" model from HuggingFace, a powerful model designed for multilingual text classification. This model is used to assign each piece of text to one of the predefined topics based on its content. The default topics include law, finance, medical, education, politics, and support.'),
-                                    html.P('By analyzing the text with this model, the tool calculates scores for each topic and assigns the text to the topic with the highest score. This process helps in identifying the dominant themes and subjects within the dataset, allowing for a more structured and insightful analysis of the text.'),
+                                    html.P('The tool utilizes the "sentence-transformers/all-MiniLM-L6-v2" sentence embedding model, the same model used by the refusal and jailbreak analyses. The candidate topics are embedded once, and each piece of text is compared with all of them at the same time. The default topics include law, finance, medical, education, politics, and support.'),
+                                    html.P('By analyzing the text with this model, the tool calculates a similarity score for each topic and assigns the text to the topic with the highest score, also listing the best-scoring topics. This process helps in identifying the dominant themes and subjects within the dataset, allowing for a more structured and insightful analysis of the text.'),
                                     html.P([
                                         "For more details on the model used for topic classification, visit the ",
-                                        html.A('MoritzLaurer/mDeBERTa-v3-base-xnli-multilingual-nli-2mil7', href='https://huggingface.co/MoritzLaurer/mDeBERTa-v3-base-xnli-multilingual-nli-2mil7', target='_blank'),
+                                        html.A('sentence-transformers/all-MiniLM-L6-v2', href='https://huggingface.co/sentence-transformers/all-MiniLM-L6-v2', target='_blank'),
                                         " page."
                                     ])
                                 ])
@@ -616,81 +663,139 @@ def close_tour_component(n_clicks):
         return {'display': 'none'}, {'display': 'none'}
     return dash.no_update, dash.no_update
 
-# Function to process the uploaded file
-def parse_contents(contents, instruction_name, input_name, response_name):
-    content_type, content_string = contents.split(',')
-    decoded = base64.b64decode(content_string)
-    
-    try:
-        if 'csv' in content_type:
-            df = pd.read_csv(io.StringIO(decoded.decode('utf-8')))
-        elif 'excel' in content_type:
-            df = pd.read_excel(io.BytesIO(decoded))
-        elif 'json' in content_type:
-            df = pd.read_json(io.StringIO(decoded.decode('utf-8')))
-        else:
-            raise ValueError('Unsupported file format')
+# Gerenciador dos jobs de análise executados no servidor. TEXT_ANALYSIS_PROCESS_WORKERS > 1 distribui
+# os analisadores limitados pela CPU (textstat, patterns, sentiment) entre vários processos.
+job_manager = JobManager(process_workers=int(os.environ.get('TEXT_ANALYSIS_PROCESS_WORKERS', 0)))
 
-        df = rename_columns(df, instruction_name, input_name, response_name)
-        return df
-    
-    except Exception as e:
-        print(f"Error processing file: {str(e)}")
-        return None
+# Datasets e resultados ficam no servidor; os dcc.Store guardam apenas handles
+result_store = ResultStore()
 
+# Aquecimento dos analisadores de TEXT_ANALYSIS_WARMUP na partida; a réplica só fica pronta no fim.
+# Ele é iniciado pelos pontos de entrada que servem o app (__main__ e create_server), e não na
+# importação: os workers do pool de processos reimportam este módulo (como __mp_main__) e o
+# processo pai do reloader do Werkzeug também o executa, e nenhum deles deve carregar os modelos.
+warmup = Warmup()
 
-def load_hf_dataset(path, instruction_name, input_name, response_name):
-    try:
-        ds = load_dataset(path)
-        df = pd.DataFrame(ds['train'])
-        df = rename_columns(df, instruction_name, input_name, response_name)
-        return df
-    
-    except Exception as e:
-        print(f"Error loading Hugging Face dataset: {str(e)}")
-        return html.Div(f"Error loading Hugging Face dataset: {str(e)}")
 
-def rename_columns(df, instruction_name=None, input_name=None, response_name=None):
-    renaming_map = {}
-    
-    input_alternatives = ['input', 'prompt']
-    response_alternatives = ['response', 'output']
+def start_warmup():
+    if WARMUP_ANALYZERS:
+        warmup.start(parse_names(WARMUP_ANALYZERS))
 
-    if instruction_name and instruction_name in df.columns:
-        renaming_map[instruction_name] = 'instruction'
-    
-    if input_name and input_name in df.columns:
-        if 'instruction' in renaming_map.values() or 'instruction' in df.columns:
-            renaming_map[input_name] = 'input'
-        else:
-            renaming_map[input_name] = 'prompt'
-    else:
-        for name in input_alternatives:
-            if name in df.columns:
-                if 'instruction' in renaming_map.values() or 'instruction' in df.columns:
-                    renaming_map[name] = 'input'
-                else:
-                    renaming_map[name] = 'prompt'
-                break
-    
-    if response_name and response_name in df.columns:
-        renaming_map[response_name] = 'response'
+
+# Ponto de entrada WSGI, ex.: gunicorn "app:create_server()"; cada worker aquece os seus analisadores
+def create_server():
+    start_warmup()
+    return app.server
+
+# Saídas usadas quando o callback de processamento não deve alterar nada
+IDLE_JOB_OUTPUTS = (dash.no_update, dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update, dash.no_update)
+
+
+# Endpoint leve de progresso consultado pelo navegador
+@app.server.route('/jobs/<job_id>')
+def job_progress(job_id):
+    progress = job_manager.progress(job_id)
+    if progress is None:
+        return flask.jsonify({'error': 'Job not found'}), 404
+    return flask.jsonify(progress)
+
+
+# Liveness: o processo está de pé e servindo requisições
+@app.server.route('/healthz')
+def healthz():
+    return flask.jsonify({'status': 'ok'})
+
+
+# Readiness: 503 enquanto o aquecimento não terminar (ou se tiver falhado)
+@app.server.route('/readyz')
+def readyz():
+    state = warmup.state()
+    return flask.jsonify(state), 200 if state['ready'] else 503
+
+
+# GET mostra o estado do aquecimento; POST inicia um aquecimento dos analisadores em ?analyzers=
+# (lista separada por vírgulas ou 'all'; padrão: TEXT_ANALYSIS_WARMUP, ou todos)
+@app.server.route('/warmup', methods=['GET', 'POST'])
+def warmup_endpoint():
+    if flask.request.method == 'POST':
+        names = parse_names(flask.request.args.get('analyzers') or WARMUP_ANALYZERS or 'all')
+        try:
+            started = warmup.start(names)
+        except ValueError as e:
+            return flask.jsonify({'error': str(e)}), 400
+        return flask.jsonify(dict(warmup.state(), started=started)), 202
+    return flask.jsonify(warmup.state())
+
+
+# Tempo de carga e memória de cada analisador já carregado neste processo
+@app.server.route('/analyzers')
+def analyzers_status():
+    return flask.jsonify(loaded_stats())
+
+
+# Tamanho e taxa de acerto do cache de resultados por texto
+@app.server.route('/cache')
+def cache_status():
+    cache = get_cache()
+    return flask.jsonify(cache.stats() if cache is not None else {'enabled': False})
+
+
+# Latência, linhas/s, tamanho dos textos e acertos do cache por analisador e etapa de ingestão,
+# no formato de texto do Prometheus (apenas deste processo)
+@app.server.route('/metrics')
+def prometheus_metrics():
+    return flask.Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+# Textos e tamanho dos armazéns de embeddings abertos neste processo
+@app.server.route('/embeddings')
+def embeddings_status():
+    return flask.jsonify(stores_stats())
+
+
+# Tempo por expressão, estouros do orçamento de tempo e avisos do linter dos padrões em uso
+# (apenas deste processo; workers do pool de processos têm as próprias contagens)
+@app.server.route('/patterns')
+def patterns_status():
+    if not is_loaded('patterns'):
+        return flask.jsonify({'loaded': False})
+    return flask.jsonify(get_analyzer('patterns').pattern_stats())
+
+
+def start_analysis_job(name, data, make_analyzer=None, **analyze_kwargs):
+    job_id = job_manager.submit(
+        name,
+        result_store.iter_chunks(data),
+        data['rows'],
+        make_analyzer or (lambda: get_analyzer(name)),
+        analyze_kwargs=analyze_kwargs,
+        on_result=lambda results: result_store.put_chunks(data['dataset'], name, results)
+    )
+    print(f"Job {job_id} ({name}) started for {data['rows']} rows.")
+    return None, job_id, 0, "0%", False, "Estimating time remaining...", {"display": "block"}, {"display": "block"}
+
+
+def poll_analysis_job(job_id):
+    progress = job_manager.progress(job_id) if job_id else None
+    if progress is None:
+        return IDLE_JOB_OUTPUTS
+
+    percent = progress['percent']
+
+    if progress['status'] == 'failed':
+        return dash.no_update, None, percent, f"{percent:.0f}%", True, f"Analysis failed: {progress['error']}", {"display": "none"}, {"display": "block"}
+
+    if progress['status'] == 'finished':
+        print(f"Job {job_id} ({progress['name']}) complete in {progress['elapsed']:.2f} seconds.")
+        # Apenas o handle do resultado salvo no servidor vai para o navegador
+        return job_manager.result(job_id), None, 100, "100%", True, "Processing complete.", {"display": "none"}, {"display": "none"}
+
+    if progress['eta'] is not None:
+        time_estimate_text = f"Estimated time remaining: {progress['eta']:.2f} seconds ({progress['rows_per_second']:.1f} rows/s)"
     else:
-        for name in response_alternatives:
-            if name in df.columns:
-                renaming_map[name] = 'response'
-                break
-    
-    df.rename(columns=renaming_map, inplace=True)
-    
-    if 'instruction' in df.columns and 'input' in df.columns:
-        df['prompt'] = df['instruction'] + ". " + df['input']
-    
-    return df
+        time_estimate_text = "Estimating time remaining..."
 
-# Global variables to store time estimates
-average_time_per_row = None
-time_estimates = []
+    return dash.no_update, dash.no_update, percent, f"{percent:.0f}%", False, time_estimate_text, {"display": "block"}, {"display": "block"}
 
 # Callback to process the uploaded data
 @app.callback(
@@ -716,25 +821,30 @@ def process_data(n_clicks, upload_contents, hf_path, instruction_name, input_nam
 
     if manual_prompt and manual_response:
         df = pd.DataFrame({'prompt': [manual_prompt], 'response': [manual_response]})
-        return [df.to_dict('records'), 'Manual input loaded as dataset.', True]
+        return [result_store.put(result_store.new_dataset_id(), 'dataset', df), 'Manual input loaded as dataset.', True]
 
-    if upload_contents:
-        df = parse_contents(upload_contents, instruction_name, input_name, response_name)
-    elif hf_path:
-        df = load_hf_dataset(hf_path, instruction_name, input_name, response_name)
-    else:
-        return [dash.no_update, 'No dataset provided.', dash.no_update]
+    # O dataset é lido em blocos e gravado no servidor parte por parte
+    try:
+        if upload_contents:
+            chunks = iter_upload_chunks(upload_contents, instruction_name=instruction_name, input_name=input_name, response_name=response_name)
+        elif hf_path:
+            chunks = iter_hf_chunks(hf_path, instruction_name=instruction_name, input_name=input_name, response_name=response_name)
+        else:
+            return [dash.no_update, 'No dataset provided.', dash.no_update]
 
-    if df is None:
+        handle = result_store.put_chunks(result_store.new_dataset_id(), 'dataset', chunks)
+    except Exception as e:
+        print(f"Error loading dataset: {str(e)}")
         return [dash.no_update, 'Error loading dataset.', False]
     
-    return [df.to_dict('records'), 'Dataset loaded successfully.', True]
+    return [handle, 'Dataset loaded successfully.', True]
 
 
 # Callback para lidar com o clique do botão de análise de toxicidade e atualizar a barra de progresso
 @app.callback(
     [
         Output('toxicity-results', 'data'),
+        Output('toxicity-job', 'data'),
         Output("progress", "value"),
         Output("progress", "label"),
         Output("progress-interval", "disabled"),
@@ -748,67 +858,22 @@ def process_data(n_clicks, upload_contents, hf_path, instruction_name, input_nam
     ],
     [
         State('stored-dataframe', 'data'),
-        State('toxicity-results', 'data')
+        State('toxicity-job', 'data')
     ],
     prevent_initial_call=True
 )
-def process_toxicity_analysis(toxicity_n_clicks, n_intervals, data, current_results):
-    global average_time_per_row
-    global time_estimates
-
-    df = pd.DataFrame(data)
-    toxicity_analyzer = ToxicityAnalyzer()
-
+def process_toxicity_analysis(toxicity_n_clicks, n_intervals, data, job_id):
     if ctx.triggered_id == 'toxicity-process-button':
-        if toxicity_n_clicks == 0:
-            return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update, dash.no_update
-        
-        print("Toxicity button clicked. Starting analysis...")
-        time_estimates = []
-        average_time_per_row = None
+        if toxicity_n_clicks == 0 or not data:
+            return IDLE_JOB_OUTPUTS
 
-        initial_estimated_time = 0.1 * len(df) * 3
-        return [], 0, "0%", False, f"Estimated time remaining: {initial_estimated_time:.2f} seconds", {"display": "block"}, {"display": "block"}
-
-    if ctx.triggered_id != 'progress-interval':
-        return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update, dash.no_update
-
-    if not data:
-        print("No data available.")
-        return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update
-    
-    if n_intervals <= len(df):
-        start_time = time.time()
-        row = df.iloc[n_intervals-1]
-        print(f"Processing row: {n_intervals} of {len(df)}")
-        row_result = toxicity_analyzer.analyze(pd.DataFrame([row]))
-        end_time = time.time()
-        
-        elapsed_time = end_time - start_time
-        time_estimates.append(elapsed_time)
-
-        if len(time_estimates) == 1 and average_time_per_row is None:
-            average_time_per_row = sum(time_estimates) / len(time_estimates)
-
-        if current_results is None:
-            current_results = []
-        current_results.append(row_result.to_dict('records')[0])
-
-        progress = ((n_intervals) / len(df)) * 100
-        print(f"Progress: {progress:.2f}%")
+        print("Toxicity button clicked. Starting analysis...")
+        return start_analysis_job('toxicity', data)
 
-        if average_time_per_row:
-            n_df = len(df) - n_intervals 
-            estimated_time_remaining = average_time_per_row * n_df 
-            time_estimate_text = f"Estimated time remaining: {estimated_time_remaining:.2f} seconds"
-        else:
-            initial_estimated_time = 0.1 * len(df) * 2
-            time_estimate_text = f"Estimated time remaining: {initial_estimated_time:.2f} seconds"
+    if ctx.triggered_id == 'progress-interval':
+        return poll_analysis_job(job_id)
 
-        return current_results, progress, f"{progress:.0f}%", False, time_estimate_text, {"display": "block"}, {"display": "block"}
-    
-    print("Processing complete.")
-    return current_results, 100, "100%", True, "Processing complete.", {"display": "none"}, {"display": "none"}
+    return IDLE_JOB_OUTPUTS
 
 
 # Callback para exibir os resultados de toxicidade
@@ -819,7 +884,7 @@ def process_toxicity_analysis(toxicity_n_clicks, n_intervals, data, current_resu
 )
 def display_toxicity_results(toxicity_results):
     if toxicity_results:
-        results_df = pd.DataFrame(toxicity_results)
+        results_df = result_store.get(toxicity_results)
         selected_columns = ['prompt', 'response', 'prompt_toxicity', 'response_toxicity']
         results_df = results_df[selected_columns]
 
@@ -956,6 +1021,7 @@ def display_toxicity_results(toxicity_results):
 @app.callback(
     [
         Output('sentiment-results', 'data'),
+        Output('sentiment-job', 'data'),
         Output("sentiment-progress", "value"),
         Output("sentiment-progress", "label"),
         Output("sentiment-progress-interval", "disabled"),
@@ -969,68 +1035,22 @@ def display_toxicity_results(toxicity_results):
     ],
     [
         State('stored-dataframe', 'data'),
-        State('sentiment-results', 'data')
+        State('sentiment-job', 'data')
     ],
     prevent_initial_call=True
 )
-def process_sentiment_analysis(sentiment_n_clicks, n_intervals, data, current_results):
-    global average_time_per_row
-    global time_estimates
-
-    df = pd.DataFrame(data)
-    sentiment_analyzer = SentimentAnalyzer()
-
+def process_sentiment_analysis(sentiment_n_clicks, n_intervals, data, job_id):
     if ctx.triggered_id == 'sentiment-process-button':
-        if sentiment_n_clicks == 0:
-            return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update, dash.no_update
-        
-        print("Sentiment button clicked. Starting analysis...")
-        time_estimates = []
-        average_time_per_row = None
-
-        initial_estimated_time = 0.1 * len(df) * 3
-        return [], 0, "0%", False, f"Estimated time remaining: {initial_estimated_time:.2f} seconds", {"display": "block"}, {"display": "block"}
-
-    if ctx.triggered_id != 'sentiment-progress-interval':
-        return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update, dash.no_update
-
-    if not data:
-        print("No data available.")
-        return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update
-    
+        if sentiment_n_clicks == 0 or not data:
+            return IDLE_JOB_OUTPUTS
 
-    if n_intervals <= len(df):
-        start_time = time.time()
-        row = df.iloc[n_intervals-1]
-        print(f"Processing row: {n_intervals} of {len(df)}")
-        row_result = sentiment_analyzer.analyze(pd.DataFrame([row]))
-        end_time = time.time()
-        
-        elapsed_time = end_time - start_time
-        time_estimates.append(elapsed_time)
-
-        if len(time_estimates) == 1 and average_time_per_row is None:
-            average_time_per_row = sum(time_estimates) / len(time_estimates)
-
-        if current_results is None:
-            current_results = []
-        current_results.append(row_result.to_dict('records')[0])
-
-        progress = ((n_intervals) / len(df)) * 100
-        print(f"Progress: {progress:.2f}%")
+        print("Sentiment button clicked. Starting analysis...")
+        return start_analysis_job('sentiment', data)
 
-        if average_time_per_row:
-            n_df = len(df) - n_intervals 
-            estimated_time_remaining = average_time_per_row * n_df * 2
-            time_estimate_text = f"Estimated time remaining: {estimated_time_remaining:.2f} seconds"
-        else:
-            initial_estimated_time = 0.2 * len(df)
-            time_estimate_text = f"Estimated time remaining: {initial_estimated_time:.2f} seconds"
+    if ctx.triggered_id == 'sentiment-progress-interval':
+        return poll_analysis_job(job_id)
 
-        return current_results, progress, f"{progress:.0f}%", False, time_estimate_text, {"display": "block"}, {"display": "block"}
-    
-    print("Processing complete.")
-    return current_results, 100, "100%", True, "Processing complete.", {"display": "none"}, {"display": "none"}
+    return IDLE_JOB_OUTPUTS
 
 
 # Callback para exibir os resultados de sentimento
@@ -1041,7 +1061,7 @@ def process_sentiment_analysis(sentiment_n_clicks, n_intervals, data, current_re
 )
 def display_sentiment_results(sentiment_results):
     if sentiment_results:
-        results_df = pd.DataFrame(sentiment_results)
+        results_df = result_store.get(sentiment_results)
         selected_columns = ['prompt', 'response', 'prompt_sentiment', 'response_sentiment']
         results_df = results_df[selected_columns]
 
@@ -1176,6 +1196,7 @@ def display_sentiment_results(sentiment_results):
 @app.callback(
     [
         Output('prompt-results', 'data'),
+        Output('prompt-job', 'data'),
         Output("prompt-progress", "value"),
         Output("prompt-progress", "label"),
         Output("prompt-progress-interval", "disabled"),
@@ -1189,68 +1210,22 @@ def display_sentiment_results(sentiment_results):
     ],
     [
         State('stored-dataframe', 'data'),
-        State('prompt-results', 'data')
+        State('prompt-job', 'data')
     ],
     prevent_initial_call=True
 )
-def process_prompt_analysis(prompt_n_clicks, n_intervals, data, current_results):
-    global average_time_per_row
-    global time_estimates
-
-    df = pd.DataFrame(data)
-    prompt_analyzer = PromptAnalyzer()
-
+def process_prompt_analysis(prompt_n_clicks, n_intervals, data, job_id):
     if ctx.triggered_id == 'prompt-process-button':
-        if prompt_n_clicks == 0:
-            return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update, dash.no_update
-        
-        print("Prompt button clicked. Starting analysis...")
-        time_estimates = []
-        average_time_per_row = None
-
-        initial_estimated_time = 0.1 * len(df) * 3
-        return [], 0, "0%", False, f"Estimated time remaining: {initial_estimated_time:.2f} seconds", {"display": "block"}, {"display": "block"}
-
-    if ctx.triggered_id != 'prompt-progress-interval':
-        return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update, dash.no_update
-
-    if not data:
-        print("No data available.")
-        return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update
-    
-    
-    if n_intervals <= len(df):
-        start_time = time.time()
-        row = df.iloc[n_intervals-1]
-        print(f"Processing row: {n_intervals} of {len(df)}")
-        row_result = prompt_analyzer.analyze(pd.DataFrame([row]))
-        end_time = time.time()
-        
-        elapsed_time = end_time - start_time
-        time_estimates.append(elapsed_time)
-
-        if len(time_estimates) == 1 and average_time_per_row is None:
-            average_time_per_row = sum(time_estimates) / len(time_estimates)
+        if prompt_n_clicks == 0 or not data:
+            return IDLE_JOB_OUTPUTS
 
-        if current_results is None:
-            current_results = []
-        current_results.append(row_result.to_dict('records')[0])
-
-        progress = ((n_intervals) / len(df)) * 100
-        print(f"Progress: {progress:.2f}%")
+        print("Prompt button clicked. Starting analysis...")
+        return start_analysis_job('prompt', data)
 
-        if average_time_per_row:
-            n_df = len(df) - n_intervals 
-            estimated_time_remaining = average_time_per_row * n_df
-            time_estimate_text = f"Estimated time remaining: {estimated_time_remaining:.2f} seconds"
-        else:
-            initial_estimated_time = 0.1 * len(df) * 2
-            time_estimate_text = f"Estimated time remaining: {initial_estimated_time:.2f} seconds"
+    if ctx.triggered_id == 'prompt-progress-interval':
+        return poll_analysis_job(job_id)
 
-        return current_results, progress, f"{progress:.0f}%", False, time_estimate_text, {"display": "block"}, {"display": "block"}
-    
-    print("Processing complete.")
-    return current_results, 100, "100%", True, "Processing complete.", {"display": "none"}, {"display": "none"}
+    return IDLE_JOB_OUTPUTS
 
 @app.callback(
     Output('prompt-analysis-results', 'children'),
@@ -1259,13 +1234,8 @@ def process_prompt_analysis(prompt_n_clicks, n_intervals, data, current_results)
 )
 def display_prompt_results(prompt_results):
     if prompt_results:
-        results_df = pd.DataFrame(prompt_results)
-        selected_columns = ['prompt', 'prompt_injection', 'prompt_jailbreak']
-        
-        # Converte as listas para valores simples (sem colchetes)
-        for col in selected_columns[1:]:  # Ignora a coluna 'prompt'
-            results_df[col] = results_df[col].apply(lambda x: x[0] if isinstance(x, list) and len(x) > 0 else x)
-        
+        results_df = result_store.get(prompt_results)
+
         # Calcula max, mean, e std para cada coluna
         max_prompt_injection = results_df['prompt_injection'].max()
         mean_prompt_injection = results_df['prompt_injection'].mean()
@@ -1387,6 +1357,7 @@ def display_prompt_results(prompt_results):
 @app.callback(
     [
         Output('refusal-results', 'data'),
+        Output('refusal-job', 'data'),
         Output("refusal-progress", "value"),
         Output("refusal-progress", "label"),
         Output("refusal-progress-interval", "disabled"),
@@ -1400,68 +1371,22 @@ def display_prompt_results(prompt_results):
     ],
     [
         State('stored-dataframe', 'data'),
-        State('refusal-results', 'data')
+        State('refusal-job', 'data')
     ],
     prevent_initial_call=True
 )
-def process_refusal_analysis(refusal_n_clicks, n_intervals, data, current_results):
-    global average_time_per_row
-    global time_estimates
-
-    df = pd.DataFrame(data)
-    refusal_analyzer = RefusalAnalyzer()
-
+def process_refusal_analysis(refusal_n_clicks, n_intervals, data, job_id):
     if ctx.triggered_id == 'refusal-process-button':
-        if refusal_n_clicks == 0:
-            return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update, dash.no_update
-        
-        print("Refusal button clicked. Starting analysis...")
-        time_estimates = []
-        average_time_per_row = None
-
-        initial_estimated_time = 0.1 * len(df) * 3
-        return [], 0, "0%", False, f"Estimated time remaining: {initial_estimated_time:.2f} seconds", {"display": "block"}, {"display": "block"}
-
-    if ctx.triggered_id != 'refusal-progress-interval':
-        return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update, dash.no_update
+        if refusal_n_clicks == 0 or not data:
+            return IDLE_JOB_OUTPUTS
 
-    if not data:
-        print("No data available.")
-        return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update
-
-
-    if n_intervals <= len(df):
-        start_time = time.time()
-        row = df.iloc[n_intervals-1]
-        print(f"Processing row: {n_intervals + 1} of {len(df)}")
-        row_result = refusal_analyzer.analyze(pd.DataFrame([row]))
-        end_time = time.time()
-        
-        elapsed_time = end_time - start_time
-        time_estimates.append(elapsed_time)
-
-        if len(time_estimates) == 1 and average_time_per_row is None:
-            average_time_per_row = sum(time_estimates) / len(time_estimates)
-
-        if current_results is None:
-            current_results = []
-        current_results.append(row_result.to_dict('records')[0])
-
-        progress = ((n_intervals) / len(df)) * 100
-        print(f"Progress: {progress:.2f}%")
-
-        if average_time_per_row:
-            n_df = len(df) - n_intervals 
-            estimated_time_remaining = average_time_per_row * n_df * 2
-            time_estimate_text = f"Estimated time remaining: {estimated_time_remaining:.2f} seconds"
-        else:
-            initial_estimated_time = 0.1 * len(df) * 2
-            time_estimate_text = f"Estimated time remaining: {initial_estimated_time:.2f} seconds"
+        print("Refusal button clicked. Starting analysis...")
+        return start_analysis_job('refusal', data)
 
-        return current_results, progress, f"{progress:.0f}%", False, time_estimate_text, {"display": "block"}, {"display": "block"}
+    if ctx.triggered_id == 'refusal-progress-interval':
+        return poll_analysis_job(job_id)
 
-    print("Processing complete.")
-    return current_results, 100, "100%", True, "Processing complete.", {"display": "none"}, {"display": "none"}
+    return IDLE_JOB_OUTPUTS
 
 @app.callback(
     Output('refusal-analysis-results', 'children'),
@@ -1470,7 +1395,7 @@ def process_refusal_analysis(refusal_n_clicks, n_intervals, data, current_result
 )
 def display_refusal_results(refusal_results):
     if refusal_results:
-        results_df = pd.DataFrame(refusal_results)
+        results_df = result_store.get(refusal_results)
         selected_columns = ['prompt', 'response', 'refusal']
         results_df = results_df[selected_columns]
 
@@ -1556,6 +1481,7 @@ def display_refusal_results(refusal_results):
 @app.callback(
     [
         Output('topics-results', 'data'),
+        Output('topics-job', 'data'),
         Output("topics-progress", "value"),
         Output("topics-progress", "label"),
         Output("topics-progress-interval", "disabled"),
@@ -1570,72 +1496,23 @@ def display_refusal_results(refusal_results):
     [
         State('stored-dataframe', 'data'),
         State('topics-input', 'value'),  # Adiciona o estado para capturar os tópicos inseridos pelo usuário
-        State('topics-results', 'data')
+        State('topics-job', 'data')
     ],
     prevent_initial_call=True
 )
-def process_topics_analysis(topics_n_clicks, n_intervals, data, topics_input, current_results):
-    global average_time_per_row
-    global time_estimates
-
-    if not data:
-        return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update, dash.no_update
-
-    df = pd.DataFrame(data)
-    topics_analyzer = TopicsAnalyzer()
-
-    # Processa a lista de tópicos inseridos pelo usuário
-    topics_list = [topic.strip() for topic in topics_input.split(',')] if topics_input else None
-
-    if current_results is None:
-        current_results = []
-
+def process_topics_analysis(topics_n_clicks, n_intervals, data, topics_input, job_id):
     if ctx.triggered_id == 'topics-process-button':
-        if topics_n_clicks == 0:
-            return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update, dash.no_update
+        if topics_n_clicks == 0 or not data:
+            return IDLE_JOB_OUTPUTS
 
-        # Reset time estimates and progress
-        time_estimates = []
-        average_time_per_row = None
-
-        initial_estimated_time = 0.1 * len(df) * 3
-        return [], 0, "0%", False, f"Estimated time remaining: {initial_estimated_time:.2f} seconds", {"display": "block"}, {"display": "block"}
+        print("Topics button clicked. Starting analysis...")
+        # Processa a lista de tópicos inseridos pelo usuário
+        return start_analysis_job('topics', data, topics_list=parse_topics(topics_input))
 
     if ctx.triggered_id == 'topics-progress-interval':
-        if n_intervals <= len(df):
-            start_time = time.time()
-
-            row = df.iloc[n_intervals-1]
-            print(f"Processing row: {n_intervals} of {len(df)}")
-            row_result = topics_analyzer.analyze(pd.DataFrame([row]), topics_list=topics_list)
-
-            end_time = time.time()
-            elapsed_time = end_time - start_time
-            time_estimates.append(elapsed_time)
-
-            if len(time_estimates) > 0 and average_time_per_row is None:
-                average_time_per_row = sum(time_estimates) / len(time_estimates)
-
-            current_results.append(row_result.to_dict('records')[0])
+        return poll_analysis_job(job_id)
 
-            progress = ((n_intervals) / len(df)) * 100
-            print(f"Progress: {progress:.2f}%")
-
-            if average_time_per_row:
-                n_df = len(df) - n_intervals 
-                estimated_time_remaining = average_time_per_row * n_df * 2
-                time_estimate_text = f"Estimated time remaining: {estimated_time_remaining:.2f} seconds"
-            else:
-                initial_estimated_time = 0.1 * len(df) * 2
-                time_estimate_text = f"Estimated time remaining: {initial_estimated_time:.2f} seconds"
-
-            return current_results, progress, f"{progress:.0f}%", False, time_estimate_text, {"display": "block"}, {"display": "block"}
-
-        else:
-            print("Processing complete.")
-            return current_results, 100, "100%", True, "Processing complete.", {"display": "none"}, {"display": "none"}
-
-    return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update, dash.no_update
+    return IDLE_JOB_OUTPUTS
 
 
 @app.callback(
@@ -1645,14 +1522,18 @@ def process_topics_analysis(topics_n_clicks, n_intervals, data, topics_input, cu
 )
 def display_topics_results(topics_results):
     if topics_results:
-        results_df = pd.DataFrame(topics_results)
-        selected_columns = ['prompt', 'response', 'prompt_topics', 'response_topics']
-        results_df = results_df[selected_columns]
+        results_df = result_store.get(topics_results)
+        selected_columns = ['prompt', 'response', 'prompt_topics', 'response_topics', 'prompt_topic_scores', 'response_topic_scores']
+        results_df = results_df[selected_columns].copy()
 
         # Calcula a frequência dos tópicos para prompt e response
         prompt_topic_counts = Counter(results_df['prompt_topics'])
         response_topic_counts = Counter(results_df['response_topics'])
 
+        # Top-k tópicos de cada texto, com a similaridade de cada um
+        for column in ('prompt_topic_scores', 'response_topic_scores'):
+            results_df[column] = results_df[column].apply(lambda x: ', '.join([f"{t['topic']}: {t['score']:.2f}" for t in x]))
+
         # Ordena os tópicos em ordem alfabética
         sorted_prompt_topics = sorted(prompt_topic_counts.keys())
         sorted_response_topics = sorted(response_topic_counts.keys())
@@ -1685,7 +1566,9 @@ def display_topics_results(topics_results):
                 {'name': 'Prompt', 'id': 'prompt'},
                 {'name': 'Response', 'id': 'response'},
                 {'name': 'Prompt Topics', 'id': 'prompt_topics'},
-                {'name': 'Response Topics', 'id': 'response_topics'}
+                {'name': 'Response Topics', 'id': 'response_topics'},
+                {'name': 'Prompt Topic Scores', 'id': 'prompt_topic_scores'},
+                {'name': 'Response Topic Scores', 'id': 'response_topic_scores'}
             ],
             data=results_df.to_dict('records'),
             page_size=3,
@@ -1745,7 +1628,8 @@ def display_topics_results(topics_results):
 
 @app.callback(
     [
-        Output('patterns-results', 'data'),  # Certifique-se de que o ID seja 'patterns-results'
+        Output('patterns-results', 'data'),
+        Output('patterns-job', 'data'),
         Output("patterns-progress", "value"),
         Output("patterns-progress", "label"),
         Output("patterns-progress-interval", "disabled"),
@@ -1759,68 +1643,22 @@ def display_topics_results(topics_results):
     ],
     [
         State('stored-dataframe', 'data'),
-        State('patterns-results', 'data')  # Certifique-se de que o ID seja 'patterns-results'
+        State('patterns-job', 'data')
     ],
     prevent_initial_call=True
 )
-
-def process_patterns_analysis(patterns_n_clicks, n_intervals, data, current_results):
-    global average_time_per_row
-    global time_estimates
-
-    df = pd.DataFrame(data)
-    patterns_analyzer = RegexAnalyzer()
-
+def process_patterns_analysis(patterns_n_clicks, n_intervals, data, job_id):
     if ctx.triggered_id == 'patterns-process-button':
-        if patterns_n_clicks == 0:
-            return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update, dash.no_update
-        
-        print("Patterns button clicked. Starting analysis...")
-        time_estimates = []
-        average_time_per_row = None
-
-        initial_estimated_time = 0.1 * len(df) * 3
-        return [], 0, "0%", False, f"Estimated time remaining: {initial_estimated_time:.2f} seconds", {"display": "block"}, {"display": "block"}
-
-    if ctx.triggered_id != 'patterns-progress-interval':
-        return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update, dash.no_update
-
-    if not data:
-        print("No data available.")
-        return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update
-    
-    if n_intervals <= len(df):
-        start_time = time.time()
-        row = df.iloc[n_intervals-1]
-        print(f"Processing row: {n_intervals} of {len(df)}")
-        row_result = patterns_analyzer.analyze(pd.DataFrame([row]))
-        end_time = time.time()
-        
-        elapsed_time = end_time - start_time
-        time_estimates.append(elapsed_time)
-
-        if len(time_estimates) == 1 and average_time_per_row is None:
-            average_time_per_row = sum(time_estimates) / len(time_estimates)
+        if patterns_n_clicks == 0 or not data:
+            return IDLE_JOB_OUTPUTS
 
-        if current_results is None:
-            current_results = []
-        current_results.append(row_result.to_dict('records')[0])
-
-        progress = ((n_intervals) / len(df)) * 100
-        print(f"Progress: {progress:.2f}%")
+        print("Patterns button clicked. Starting analysis...")
+        return start_analysis_job('patterns', data)
 
-        if average_time_per_row:
-            n_df = len(df) - n_intervals 
-            estimated_time_remaining = average_time_per_row * n_df
-            time_estimate_text = f"Estimated time remaining: {estimated_time_remaining:.2f} seconds"
-        else:
-            initial_estimated_time = 0.1 * len(df) * 2
-            time_estimate_text = f"Estimated time remaining: {initial_estimated_time:.2f} seconds"
+    if ctx.triggered_id == 'patterns-progress-interval':
+        return poll_analysis_job(job_id)
 
-        return current_results, progress, f"{progress:.0f}%", False, time_estimate_text, {"display": "block"}, {"display": "block"}
-    
-    print("Processing complete.")
-    return current_results, 100, "100%", True, "Processing complete.", {"display": "none"}, {"display": "none"}
+    return IDLE_JOB_OUTPUTS
 
 @app.callback(
     Output('patterns-analysis-results', 'children'),
@@ -1829,7 +1667,7 @@ def process_patterns_analysis(patterns_n_clicks, n_intervals, data, current_resu
 )
 def display_patterns_results(patterns_results):
     if patterns_results:
-        results_df = pd.DataFrame(patterns_results)
+        results_df = result_store.get(patterns_results)
         selected_columns = ['prompt', 'response', 'prompt_patterns', 'response_patterns']
         results_df = results_df[selected_columns]
 
@@ -1837,13 +1675,19 @@ def display_patterns_results(patterns_results):
         prompt_patterns_counts = Counter(results_df['prompt_patterns'])
         response_patterns_counts = Counter(results_df['response_patterns'])
 
-        # Filtra o padrão mais comum ignorando 'None'
-        top_prompt_patterns = [pattern for pattern in prompt_patterns_counts if pattern is not None]
+        # Filtra o padrão mais comum ignorando 'None' e os textos que estouraram o tempo limite
+        top_prompt_patterns = [pattern for pattern in prompt_patterns_counts if pd.notna(pattern) and pattern != TIMED_OUT]
         top_prompt_patterns = top_prompt_patterns[0] if top_prompt_patterns else "None"
 
-        top_response_patterns = [pattern for pattern in response_patterns_counts if pattern is not None]
+        top_response_patterns = [pattern for pattern in response_patterns_counts if pd.notna(pattern) and pattern != TIMED_OUT]
         top_response_patterns = top_response_patterns[0] if top_response_patterns else "None"
 
+        # Textos cuja busca foi interrompida pelo orçamento de tempo (resultado desconhecido, fora do cache)
+        timed_out_text = (
+            f"{prompt_patterns_counts[TIMED_OUT]} prompts and {response_patterns_counts[TIMED_OUT]} responses "
+            "exceeded the pattern time budget and were not classified."
+        )
+
         # Cria gráficos de barra para a distribuição de padrões
         prompt_patterns_fig = px.bar(
             x=list(prompt_patterns_counts.keys()),  # Passa as chaves do contador como lista para x
@@ -1915,6 +1759,9 @@ def display_patterns_results(patterns_results):
                     ])
                 ]), width=6)
             ]),
+            dbc.Row([
+                dbc.Col(html.P(timed_out_text, className="text-muted"), width=12)
+            ]) if prompt_patterns_counts[TIMED_OUT] or response_patterns_counts[TIMED_OUT] else None,
             dbc.Row([
                 dbc.Col(dcc.Graph(figure=prompt_patterns_fig), width=6),
                 dbc.Col(dcc.Graph(figure=response_patterns_fig), width=6),
@@ -1929,6 +1776,7 @@ def display_patterns_results(patterns_results):
 @app.callback(
     [
         Output('entity-results', 'data'),
+        Output('entity-job', 'data'),
         Output("entity-progress", "value"),
         Output("entity-progress", "label"),
         Output("entity-progress-interval", "disabled"),
@@ -1942,76 +1790,28 @@ def display_patterns_results(patterns_results):
     ],
     [
         State('stored-dataframe', 'data'),
-        State('identificação_pessoal-selection', 'value'),  # Corrigido
-        State('cartões_de_crédito-selection', 'value'),  # Corrigido
-        State('localização-selection', 'value'),  # Corrigido
-        State('documentos-selection', 'value'),  # Corrigido
-        State('outros-selection', 'value'),  # Corrigido
-        State('entity-results', 'data')
+        State('identificação_pessoal-selection', 'value'),
+        State('cartões_de_crédito-selection', 'value'),
+        State('localização-selection', 'value'),
+        State('documentos-selection', 'value'),
+        State('outros-selection', 'value'),
+        State('entity-job', 'data')
     ],
     prevent_initial_call=True
 )
-def process_entity_recognition(entity_n_clicks, n_intervals, data, identification_entities, credit_cards_entities, location_entities, documents_entities, others_entities, current_results):
-    global average_time_per_row
-    global time_estimates
-
-    if not data:
-        return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update, dash.no_update
-
-    df = pd.DataFrame(data)
-    entity_analyzer = PIIAnalyzer()
-
-    selected_entities = identification_entities + credit_cards_entities + location_entities + documents_entities + others_entities
-
-    if current_results is None:
-        current_results = []
-
+def process_entity_recognition(entity_n_clicks, n_intervals, data, identification_entities, credit_cards_entities, location_entities, documents_entities, others_entities, job_id):
     if ctx.triggered_id == 'entity-process-button':
-        if entity_n_clicks == 0:
-            return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update, dash.no_update
-
-        # Reset time estimates and progress
-        time_estimates = []
-        average_time_per_row = None
+        if entity_n_clicks == 0 or not data:
+            return IDLE_JOB_OUTPUTS
 
-        initial_estimated_time = 0.1 * len(df) * 3
-        return [], 0, "0%", False, f"Estimated time remaining: {initial_estimated_time:.2f} seconds", {"display": "block"}, {"display": "block"}
+        print("Entity button clicked. Starting analysis...")
+        selected_entities = combine_entities(identification_entities, credit_cards_entities, location_entities, documents_entities, others_entities)
+        return start_analysis_job('entity', data, selected_entities=selected_entities)
 
     if ctx.triggered_id == 'entity-progress-interval':
-        if n_intervals <= len(df):
-            start_time = time.time()
+        return poll_analysis_job(job_id)
 
-            row = df.iloc[n_intervals-1]
-            print(f"Processing row: {n_intervals} of {len(df)}")
-            row_result = entity_analyzer.analyze(pd.DataFrame([row]), selected_entities)
-
-            end_time = time.time()
-            elapsed_time = end_time - start_time
-            time_estimates.append(elapsed_time)
-
-            if len(time_estimates) > 0 and average_time_per_row is None:
-                average_time_per_row = sum(time_estimates) / len(time_estimates)
-
-            current_results.append(row_result.to_dict('records')[0])
-
-            progress = ((n_intervals) / len(df)) * 100
-            print(f"Progress: {progress:.2f}%")
-
-            if average_time_per_row:
-                n_df = len(df) - n_intervals
-                estimated_time_remaining = average_time_per_row * n_df * 2
-                time_estimate_text = f"Estimated time remaining: {estimated_time_remaining:.2f} seconds"
-            else:
-                initial_estimated_time = 0.1 * len(df) * 2
-                time_estimate_text = f"Estimated time remaining: {initial_estimated_time:.2f} seconds"
-
-            return current_results, progress, f"{progress:.0f}%", False, time_estimate_text, {"display": "block"}, {"display": "block"}
-
-        else:
-            print("Processing complete.")
-            return current_results, 100, "100%", True, "Processing complete.", {"display": "none"}, {"display": "none"}
-
-    return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update, dash.no_update
+    return IDLE_JOB_OUTPUTS
 
 @app.callback(
     Output('entity-analysis-results', 'children'),
@@ -2021,7 +1821,7 @@ def process_entity_recognition(entity_n_clicks, n_intervals, data, identificatio
 def display_entity_results(entity_results):
     if entity_results:
         # Converte os resultados em um DataFrame
-        results_df = pd.DataFrame(entity_results)
+        results_df = result_store.get(entity_results)
 
         # Inicializa contadores para entidades
         prompt_entities_counts = Counter()
@@ -2159,6 +1959,7 @@ def display_entity_results(entity_results):
 @app.callback(
     [
         Output('textstat-results', 'data'),
+        Output('textstat-job', 'data'),
         Output("textstat-progress", "value"),
         Output("textstat-progress", "label"),
         Output("textstat-progress-interval", "disabled"),
@@ -2172,67 +1973,86 @@ def display_entity_results(entity_results):
     ],
     [
         State('stored-dataframe', 'data'),
-        State('textstat-results', 'data')
+        State('textstat-job', 'data')
     ],
     prevent_initial_call=True
 )
-def process_textstat_analysis(textstat_n_clicks, n_intervals, data, current_results):
-    global average_time_per_row
-    global time_estimates
-
-    df = pd.DataFrame(data)
-    textstat_analyzer = TextStatAnalyzer(language='en')
-
+def process_textstat_analysis(textstat_n_clicks, n_intervals, data, job_id):
     if ctx.triggered_id == 'textstat-process-button':
-        if textstat_n_clicks == 0:
-            return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update, dash.no_update
-        
+        if textstat_n_clicks == 0 or not data:
+            return IDLE_JOB_OUTPUTS
+
         print("TextStat button clicked. Starting analysis...")
-        time_estimates = []
-        average_time_per_row = None
+        return start_analysis_job('textstat', data)
 
-        initial_estimated_time = 0.1 * len(df) * 3
-        return [], 0, "0%", False, f"Estimated time remaining: {initial_estimated_time:.2f} seconds", {"display": "block"}, {"display": "block"}
+    if ctx.triggered_id == 'textstat-progress-interval':
+        return poll_analysis_job(job_id)
 
-    if ctx.triggered_id != 'textstat-progress-interval':
-        return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update, dash.no_update
+    return IDLE_JOB_OUTPUTS
 
-    if not data:
-        print("No data available.")
-        return dash.no_update, dash.no_update, dash.no_update, True, dash.no_update, dash.no_update
 
-    if n_intervals <= len(df):
-        start_time = time.time()
-        row = df.iloc[n_intervals-1]
-        print(f"Processing row: {n_intervals} of {len(df)}")
-        row_result = textstat_analyzer.analyze(pd.DataFrame([row]))
-        end_time = time.time()
-        
-        elapsed_time = end_time - start_time
-        time_estimates.append(elapsed_time)
+@app.callback(
+    [
+        Output('all-results', 'data'),
+        Output('all-job', 'data'),
+        Output("all-progress", "value"),
+        Output("all-progress", "label"),
+        Output("all-progress-interval", "disabled"),
+        Output("all-time-estimate", "children"),
+        Output("all-progress", "style"),
+        Output("all-process-button", "style")
+    ],
+    [
+        Input('all-process-button', 'n_clicks'),
+        Input('all-progress-interval', 'n_intervals')
+    ],
+    [
+        State('stored-dataframe', 'data'),
+        State('topics-selection', 'data'),
+        State('entity-selection', 'data'),
+        State('all-job', 'data')
+    ],
+    prevent_initial_call=True
+)
+def process_all_analyses(all_n_clicks, n_intervals, data, topics_list, selected_entities, job_id):
+    if ctx.triggered_id == 'all-process-button':
+        if all_n_clicks == 0 or not data:
+            return IDLE_JOB_OUTPUTS
+
+        print("Analyze everything button clicked. Starting analysis...")
+        kwargs_by_name = {
+            'topics': {'topics_list': topics_list},
+            'entity': {'selected_entities': selected_entities}
+        }
+        return start_analysis_job('all', data, make_analyzer=Pipeline, kwargs_by_name=kwargs_by_name)
 
-        if len(time_estimates) == 1 and average_time_per_row is None:
-            average_time_per_row = sum(time_estimates) / len(time_estimates)
+    if ctx.triggered_id == 'all-progress-interval':
+        return poll_analysis_job(job_id)
 
-        if current_results is None:
-            current_results = []
-        current_results.append(row_result.to_dict('records')[0])
+    return IDLE_JOB_OUTPUTS
 
-        progress = ((n_intervals) / len(df)) * 100
-        print(f"Progress: {progress:.2f}%")
 
-        if average_time_per_row:
-            n_df = len(df) - n_intervals 
-            estimated_time_remaining = average_time_per_row * n_df 
-            time_estimate_text = f"Estimated time remaining: {estimated_time_remaining:.2f} seconds"
-        else:
-            initial_estimated_time = 0.1 * len(df) * 2
-            time_estimate_text = f"Estimated time remaining: {initial_estimated_time:.2f} seconds"
+# Guardam os tópicos e as entidades escolhidos nas abas, que só existem enquanto a aba está aberta
+@app.callback(
+    Output('topics-selection', 'data'),
+    Input('topics-input', 'value')
+)
+def remember_topics(topics_input):
+    return parse_topics(topics_input)
 
-        return current_results, progress, f"{progress:.0f}%", False, time_estimate_text, {"display": "block"}, {"display": "block"}
 
-    print("Processing complete.")
-    return current_results, 100, "100%", True, "Processing complete.", {"display": "none"}, {"display": "none"}
+@app.callback(
+    Output('entity-selection', 'data'),
+    [
+        Input('identificação_pessoal-selection', 'value'),
+        Input('cartões_de_crédito-selection', 'value'),
+        Input('localização-selection', 'value'),
+        Input('documentos-selection', 'value'),
+        Input('outros-selection', 'value')
+    ]
+)
+def remember_entities(identification_entities, credit_cards_entities, location_entities, documents_entities, others_entities):
+    return combine_entities(identification_entities, credit_cards_entities, location_entities, documents_entities, others_entities)
 
 
 # Callback para exibir os resultados de TextStat
@@ -2251,7 +2071,7 @@ def display_textstat_results(textstat_results, selected_metrics_col1, selected_m
     selected_metrics = selected_metrics_col1 + selected_metrics_col2 + selected_metrics_col3  # Combine todas as seleções
 
     if textstat_results and selected_metrics:
-        results_df = pd.DataFrame(textstat_results)
+        results_df = result_store.get(textstat_results)
 
         rows = []
 
@@ -2293,6 +2113,12 @@ def display_textstat_results(textstat_results, selected_metrics_col1, selected_m
     return html.Div("")
 
 
+def latest_result(tab_result, all_result):
+    if not tab_result or not all_result:
+        return tab_result or all_result
+    return all_result if all_result.get('created_at', 0) > tab_result.get('created_at', 0) else tab_result
+
+
 # Callback to switch between tabs
 @app.callback(
     Output('main-content', 'children'),
@@ -2314,17 +2140,28 @@ def display_textstat_results(textstat_results, selected_metrics_col1, selected_m
     State('patterns-results', 'data'),
     State('entity-results', 'data'),
     State('textstat-results', 'data'), 
+    State('all-results', 'data'),
     prevent_initial_call=True
 )
-def update_tab(n_clicks_data, n_clicks_sentiment, n_clicks_toxicity, n_clicks_prompt, n_clicks_refusal, n_clicks_topics, n_clicks_patterns, n_clicks_entity, n_clicks_textstat, stored_data, toxicity_results, sentiment_results, prompt_results, refusal_results, topics_results, patterns_results, entity_results, textstat_results):
+def update_tab(n_clicks_data, n_clicks_sentiment, n_clicks_toxicity, n_clicks_prompt, n_clicks_refusal, n_clicks_topics, n_clicks_patterns, n_clicks_entity, n_clicks_textstat, stored_data, toxicity_results, sentiment_results, prompt_results, refusal_results, topics_results, patterns_results, entity_results, textstat_results, all_results):
     if not ctx.triggered:
         return dash.no_update
 
+    # Cada aba mostra o resultado mais recente entre a execução própria e o "Analyze Everything"
+    toxicity_results = latest_result(toxicity_results, all_results)
+    sentiment_results = latest_result(sentiment_results, all_results)
+    prompt_results = latest_result(prompt_results, all_results)
+    refusal_results = latest_result(refusal_results, all_results)
+    topics_results = latest_result(topics_results, all_results)
+    patterns_results = latest_result(patterns_results, all_results)
+    entity_results = latest_result(entity_results, all_results)
+    textstat_results = latest_result(textstat_results, all_results)
+
     button_id = ctx.triggered_id
 
     if button_id == 'link-data-view':
         if stored_data:
-            df = pd.DataFrame(stored_data)
+            df = result_store.get(stored_data)
             table = dash_table.DataTable(
                 id='dataset-table',
                 columns=[{'name': col, 'id': col} for col in df.columns],
@@ -2458,13 +2295,7 @@ def update_tab(n_clicks_data, n_clicks_sentiment, n_clicks_toxicity, n_clicks_pr
             ])
     
     elif button_id == 'link-entity-recognition':
-        supported_entities = {
-            'Documents': ["US_DRIVER_LICENSE", "AU_ABN", "AU_ACN", "AU_TFN", "IN_PAN", "IN_VEHICLE_REGISTRATION"],
-            'Others': ["PHONE_NUMBER", "DATE_TIME", "MEDICAL_LICENSE", "EMAIL_ADDRESS", "ORGANIZATION", "URL", "CRYPTO", "UK_NHS", "BAN_CODE"],
-            'Credit Cards': ["CREDIT_CARD", "US_ITIN", "US_BANK_NUMBER", "AU_TFN", "IBAN_CODE"],
-            'Personal Identification': ['PERSON', 'EMAIL_ADDRESS', 'PHONE_NUMBER'],
-            'Location': ['LOCATION', 'IP_ADDRESS']
-        }
+        supported_entities = ENTITY_GROUPS
 
 
         # Cards organizados por coluna específica
@@ -2633,4 +2464,7 @@ def update_tab(n_clicks_data, n_clicks_sentiment, n_clicks_toxicity, n_clicks_pr
 
 
 if __name__ == '__main__':
+    # Com o reloader do modo debug, quem serve o app é o processo filho (WERKZEUG_RUN_MAIN)
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_warmup()
     app.run_server(debug=True)
\ No newline at end of file
@@ -0,0 +1,70 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+# Recall dos índices aproximados de frases de referência contra a busca exata, com os embeddings
+# reais do modelo de similaridade: as frases de um grupo (langkit + TEXT_ANALYSIS_REFERENCE_PHRASES)
+# e os textos de um dataset. Recall é a fração de textos em que o índice devolve a mesma maior
+# similaridade que a busca exata:
+#   python -m benchmarks.ann_recall --group jailbreak --input dataset.csv --column prompt --nprobe 8,16,32
+
+RECALL_TOLERANCE = 1e-5
+
+
+def measure(index, embeddings, exact):
+    start = time.perf_counter()
+    scores = index.max_similarity(embeddings)
+    seconds = time.perf_counter() - start
+    gap = exact - scores
+    return {
+        'recall': float(np.mean(gap <= RECALL_TOLERANCE)),
+        'mean_gap': float(np.mean(gap)),
+        'max_gap': float(np.max(gap)),
+        'ms_per_text': seconds / len(embeddings) * 1000
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Measure the recall of the approximate reference indexes.')
+    parser.add_argument('--group', default='jailbreak', help='Reference phrase group (default: jailbreak)')
+    parser.add_argument('--input', required=True, help='Dataset whose texts are used as queries')
+    parser.add_argument('--column', default='prompt', help='Text column of the dataset (default: prompt)')
+    parser.add_argument('--limit', type=int, default=2000, help='Number of query texts')
+    parser.add_argument('--nprobe', default='', help='Comma-separated IVF probe counts (default: the configured one)')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    from ingestion import read_dataset
+    from metrics import reference_index
+    from metrics.similarity import encode, reference_phrases
+
+    phrases = reference_phrases(args.group)
+    texts = [str(text) for text in read_dataset(args.input)[args.column].dropna()][:args.limit]
+    vectors = encode(phrases)
+    embeddings = encode(texts)
+    exact = reference_index.ExactIndex(vectors).max_similarity(embeddings)
+    print(f"{len(phrases)} '{args.group}' phrases, {len(texts)} query texts.")
+
+    indexes = []
+    for nprobe in [int(value) for value in args.nprobe.split(',') if value] or [None]:
+        start = time.perf_counter()
+        index = reference_index.IVFIndex(vectors, nprobe=nprobe)
+        indexes.append((f"ivf nprobe={index.nprobe}/{len(index.centroids)}", index, time.perf_counter() - start))
+    if reference_index.faiss is not None:
+        start = time.perf_counter()
+        indexes.append(('faiss hnsw', reference_index.FaissIndex(vectors), time.perf_counter() - start))
+
+    print(f"{'index':<28}{'build s':>9}{'recall':>9}{'mean gap':>11}{'max gap':>10}{'ms/text':>9}")
+    for label, index, build_seconds in indexes:
+        result = measure(index, embeddings, exact)
+        print(f"{label:<28}{build_seconds:>9.2f}{result['recall']:>9.1%}{result['mean_gap']:>11.5f}{result['max_gap']:>10.4f}{result['ms_per_text']:>9.3f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
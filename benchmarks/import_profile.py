@@ -0,0 +1,67 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+# Tempo de importação de um módulo do projeto (por padrão o app), medido em um processo novo com
+# python -X importtime. Mostra o tempo total até o módulo estar pronto e os pacotes de topo mais
+# caros, somando o tempo próprio de todos os seus módulos:
+#   python -m benchmarks.import_profile --module app --top 20
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+# Linhas do -X importtime: (tempo próprio em µs, tempo acumulado em µs, nível de aninhamento, módulo)
+def parse_importtime(stderr):
+    entries = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((int(self_us), int(cumulative_us), (len(indent) - 1) // 2, module))
+    return entries
+
+
+def profile(module):
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    return wall, parse_importtime(completed.stderr)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Report the import time of a project module.')
+    parser.add_argument('--module', default='app', help='Module to import (default: app)')
+    parser.add_argument('--top', type=int, default=15, help='Number of top-level packages listed')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    wall, entries = profile(args.module)
+
+    # Tempo próprio de cada módulo, agrupado pelo pacote de topo
+    packages = {}
+    for self_us, _, _, module in entries:
+        package = module.split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us
+    total_us = sum(packages.values()) or 1
+
+    print(f"import {args.module}: {wall:.2f} s wall (interpreter included), {total_us / 1e6:.2f} s in imports, {len(entries)} modules")
+    print(f"{'package':<32}{'seconds':>10}{'share':>8}")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<32}{self_us / 1e6:>10.3f}{self_us / total_us:>8.1%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
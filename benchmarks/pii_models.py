@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+# Compara as opções de modelo do PIIAnalyzer (TEXT_ANALYSIS_PII_MODEL): tempo de carga, memória
+# residente e latência por texto. Cada opção roda em um processo novo, para que a carga e a
+# memória de uma não contaminem a outra:
+#   python -m benchmarks.pii_models --models large,small,none --input dataset.csv --limit 500
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_TEXTS = [
+    "My name is John Smith and I live at 42 Baker Street, London.",
+    "Please send the invoice to maria.garcia@example.com before Friday.",
+    "Call me at 212-555-0187 or on my mobile +44 7700 900123.",
+    "The card 4111 1111 1111 1111 expires next month, the SSN on file is 078-05-1120.",
+    "Our servers at 192.168.10.24 and 10.0.0.7 were patched on 2023-03-14.",
+    "Transfer the funds to IBAN GB82 WEST 1234 5698 7654 32 and confirm by email.",
+    "Dr. Alice Johnson from Boston reviewed the case with the Brazilian team.",
+    "Can you summarize the main causes of the French Revolution in three paragraphs?",
+    "Write a Python function that sorts a list of dictionaries by a given key.",
+    "I'm sorry, but I can't help with that request."
+]
+
+
+def peak_rss_mb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KiB no Linux e em bytes no macOS
+    return usage / 2**20 if sys.platform == 'darwin' else usage / 2**10
+
+
+def load_texts(path, limit):
+    if not path:
+        texts = SAMPLE_TEXTS
+    else:
+        from ingestion import read_dataset
+        data = read_dataset(path)
+        texts = [str(text) for text in list(data['prompt']) + list(data['response'])]
+    return (texts * (limit // len(texts) + 1))[:limit]
+
+
+# Executado no processo filho: mede uma opção e imprime o resultado em JSON
+def measure(model, texts, entities, batch_size):
+    start = time.perf_counter()
+    from metrics.pii import PIIAnalyzer
+    import_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    analyzer = PIIAnalyzer(nlp_model=model)
+    load_time = time.perf_counter() - start
+    load_rss = peak_rss_mb()
+
+    latencies = []
+    found = 0
+    for text in texts:
+        start = time.perf_counter()
+        found += len(analyzer.analyze_pii(text, entities))
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    analyzer.analyze_batch(texts, batch_size=batch_size, entities=entities)
+    batch_time = time.perf_counter() - start
+
+    return {
+        'model': model,
+        'import_s': import_time,
+        'load_s': load_time,
+        'rss_after_load_mb': load_rss,
+        'peak_rss_mb': peak_rss_mb(),
+        'median_ms': statistics.median(latencies) * 1000,
+        'p95_ms': sorted(latencies)[int(len(latencies) * 0.95) - 1] * 1000,
+        'batch_texts_per_s': len(texts) / batch_time if batch_time else float('inf'),
+        'entities_found': found
+    }
+
+
+def run_child(model, args):
+    command = [sys.executable, '-m', 'benchmarks.pii_models', '--child', model,
+               '--limit', str(args.limit), '--batch-size', str(args.batch_size)]
+    if args.input:
+        command += ['--input', args.input]
+    if args.entities:
+        command += ['--entities', args.entities]
+
+    # O cache de resultados ficaria com os textos repetidos da medição; o filho roda sem ele
+    env = dict(os.environ, TEXT_ANALYSIS_CACHE='0')
+    completed = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        print(f"{model}: failed\n{completed.stderr.strip()}", file=sys.stderr)
+        return None
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Benchmark the spaCy model options of the PII analyzer.')
+    parser.add_argument('--models', default='large,small,none', help="Comma-separated options: large, small, none or any spaCy model name/path")
+    parser.add_argument('--input', default=None, help='Dataset whose prompts and responses are used as texts (default: built-in samples)')
+    parser.add_argument('--limit', type=int, default=200, help='Number of texts measured')
+    parser.add_argument('--batch-size', type=int, default=64, help='Texts per batch in the batch measurement')
+    parser.add_argument('--entities', default=None, help='Comma-separated presidio entities (default: all)')
+    parser.add_argument('--child', default=None, help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    entities = [item.strip() for item in args.entities.split(',') if item.strip()] if args.entities else None
+
+    if args.child:
+        texts = load_texts(args.input, args.limit)
+        print(json.dumps(measure(args.child, texts, entities, args.batch_size)))
+        return 0
+
+    header = f"{'model':<16}{'load s':>9}{'RSS MB':>9}{'peak MB':>9}{'median ms':>11}{'p95 ms':>9}{'batch/s':>10}{'found':>8}"
+    print(header)
+    for model in [item.strip() for item in args.models.split(',') if item.strip()]:
+        result = run_child(model, args)
+        if result is None:
+            continue
+        print(f"{result['model']:<16}{result['load_s']:>9.2f}{result['rss_after_load_mb']:>9.0f}{result['peak_rss_mb']:>9.0f}"
+              f"{result['median_ms']:>11.2f}{result['p95_ms']:>9.2f}{result['batch_texts_per_s']:>10.1f}{result['entities_found']:>8}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
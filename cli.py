@@ -0,0 +1,113 @@
+import argparse
+import sys
+import time
+
+from ingestion import SUPPORTED_EXTENSIONS, iter_file_chunks, write_dataset_chunks
+from metrics import cache
+from metrics.parallel import EXECUTOR_MODES, resolve_mode
+from metrics.pattern_engine import TIMED_OUT
+from metrics.registry import ANALYZERS
+from pipeline import run_pipeline
+
+# Execução das análises em lote, sem o app Dash:
+#   python cli.py dataset.csv resultado.parquet --analyzers toxicity,sentiment,textstat --batch-size 64 --workers 4
+
+
+def parse_list(value):
+    return [item.strip() for item in value.split(',') if item.strip()] if value else None
+
+
+def analyze_kwargs_for(name, args):
+    if name == 'topics':
+        return {'topics_list': parse_list(args.topics)}
+    if name == 'entity':
+        return {'selected_entities': parse_list(args.entities)}
+    return {}
+
+
+# Analisa um iterável de blocos de linhas e devolve os blocos de resultado na mesma ordem,
+# com o progresso no stderr. Cada bloco é lido uma vez e passa por todos os analisadores (pipeline.py).
+def run_analyzers(chunks, names, batch_size=None, workers=1, kwargs_by_name=None, mode='auto'):
+    mode = resolve_mode(mode, names, workers)
+    print(f"Running {', '.join(names)} with {workers} {mode} worker(s).", file=sys.stderr)
+
+    done = 0
+    start_time = time.perf_counter()
+    for result in run_pipeline(chunks, names, batch_size, kwargs_by_name, workers=workers, mode=mode):
+        done += len(result)
+        print(f"Processed {done} rows ({done / (time.perf_counter() - start_time):.1f} rows/s).", file=sys.stderr)
+        yield result
+
+
+def check_columns(chunks):
+    for chunk in chunks:
+        missing = [col for col in ('prompt', 'response') if col not in chunk.columns]
+        if missing:
+            raise ValueError(f"Missing columns after renaming: {', '.join(missing)}")
+        yield chunk
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Run the text analyzers over a dataset without the Dash app.')
+    parser.add_argument('input', help=f"Input dataset ({', '.join(SUPPORTED_EXTENSIONS)})")
+    parser.add_argument('output', help='Output file; the format is taken from the extension')
+    parser.add_argument('--analyzers', default=','.join(ANALYZERS), help=f"Comma-separated analyzers to run (default: all). Options: {', '.join(ANALYZERS)}")
+    parser.add_argument('--batch-size', type=int, default=None, help='Texts per model call (default: per-analyzer default)')
+    parser.add_argument('--workers', type=int, default=1, help='Number of row chunks analyzed in parallel')
+    parser.add_argument('--executor', choices=EXECUTOR_MODES, default='auto', help="Run workers as threads or processes; 'auto' uses processes when every selected analyzer is CPU-bound (textstat, patterns, sentiment)")
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Rows read and analyzed per chunk')
+    parser.add_argument('--topics', default=None, help='Comma-separated topics for the topics analyzer')
+    parser.add_argument('--entities', default=None, help='Comma-separated presidio entities for the entity analyzer (default: all)')
+    parser.add_argument('--cache-path', default=None, help='Location of the on-disk result cache')
+    parser.add_argument('--cache-max-mb', type=int, default=None, help='Size bound of the result cache in MiB')
+    parser.add_argument('--no-cache', action='store_true', help='Score every text again instead of using the result cache')
+    parser.add_argument('--instruction-column', default=None, help="Column to rename to 'instruction'")
+    parser.add_argument('--input-column', default=None, help="Column to rename to 'input'/'prompt'")
+    parser.add_argument('--response-column', default=None, help="Column to rename to 'response'")
+    return parser
+
+
+# Conta, à medida que os blocos passam, os textos cuja busca de padrões estourou o orçamento de tempo
+def count_pattern_timeouts(chunks, counts):
+    for chunk in chunks:
+        for column in ('prompt_patterns', 'response_patterns'):
+            if column in chunk.columns:
+                counts[column] = counts.get(column, 0) + int((chunk[column] == TIMED_OUT).sum())
+        yield chunk
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    names = parse_list(args.analyzers)
+    unknown = [name for name in names if name not in ANALYZERS]
+    if unknown:
+        print(f"Unknown analyzers: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    cache.configure(
+        path=args.cache_path,
+        max_bytes=args.cache_max_mb * 2**20 if args.cache_max_mb else None,
+        enabled=not args.no_cache
+    )
+
+    chunks = iter_file_chunks(args.input, args.chunk_size, args.instruction_column, args.input_column, args.response_column)
+    kwargs_by_name = {name: analyze_kwargs_for(name, args) for name in names}
+    results = run_analyzers(check_columns(chunks), names, args.batch_size, args.workers, kwargs_by_name, args.executor)
+
+    timeouts = {}
+    rows = write_dataset_chunks(count_pattern_timeouts(results, timeouts), args.output)
+    print(f"Wrote {rows} rows to {args.output}.", file=sys.stderr)
+    for column, count in timeouts.items():
+        if count:
+            print(f"{column}: {count} texts exceeded the pattern time budget and were not cached.", file=sys.stderr)
+
+    result_cache = cache.get_cache()
+    if result_cache is not None:
+        for namespace, stats in sorted(result_cache.stats()['namespaces'].items()):
+            print(f"Cache {namespace}: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1%}).", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,272 @@
+import base64
+import io
+import os
+
+import pandas as pd
+
+from metrics.instrumentation import instrument_chunks, instrument_step
+
+# Extensões suportadas na leitura e escrita de datasets fora do app
+SUPPORTED_EXTENSIONS = ('.csv', '.tsv', '.json', '.jsonl', '.parquet', '.xlsx')
+
+# Quantidade de linhas por bloco na leitura em streaming
+DEFAULT_CHUNKSIZE = 10000
+
+
+@instrument_step('rename_columns')
+def rename_columns(df, instruction_name=None, input_name=None, response_name=None):
+    renaming_map = {}
+    
+    input_alternatives = ['input', 'prompt']
+    response_alternatives = ['response', 'output']
+
+    if instruction_name and instruction_name in df.columns:
+        renaming_map[instruction_name] = 'instruction'
+    
+    if input_name and input_name in df.columns:
+        if 'instruction' in renaming_map.values() or 'instruction' in df.columns:
+            renaming_map[input_name] = 'input'
+        else:
+            renaming_map[input_name] = 'prompt'
+    else:
+        for name in input_alternatives:
+            if name in df.columns:
+                if 'instruction' in renaming_map.values() or 'instruction' in df.columns:
+                    renaming_map[name] = 'input'
+                else:
+                    renaming_map[name] = 'prompt'
+                break
+    
+    if response_name and response_name in df.columns:
+        renaming_map[response_name] = 'response'
+    else:
+        for name in response_alternatives:
+            if name in df.columns:
+                renaming_map[name] = 'response'
+                break
+    
+    df.rename(columns=renaming_map, inplace=True)
+    
+    if 'instruction' in df.columns and 'input' in df.columns:
+        df['prompt'] = df['instruction'] + ". " + df['input']
+    
+    return df
+
+
+def rename_chunks(chunks, instruction_name=None, input_name=None, response_name=None):
+    for chunk in chunks:
+        yield rename_columns(chunk, instruction_name, input_name, response_name)
+
+
+def _slice_frame(df, chunksize):
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+# JSON em linhas (JSONL) pode ser lido em blocos; um array JSON precisa ser lido inteiro
+def _is_json_lines(buffer):
+    start = buffer.read(1024).lstrip()
+    buffer.seek(0)
+    return not start.startswith(b'[')
+
+
+def _iter_parquet(source, chunksize):
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(source)
+    for batch in parquet_file.iter_batches(batch_size=chunksize):
+        yield batch.to_pandas()
+
+
+# Lê um arquivo em blocos de até chunksize linhas. CSV, TSV, JSONL e Parquet são lidos
+# de forma incremental; JSON (array) e Excel não permitem leitura parcial e são lidos inteiros.
+def iter_file_chunks(path, chunksize=DEFAULT_CHUNKSIZE, instruction_name=None, input_name=None, response_name=None):
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == '.csv':
+        chunks = pd.read_csv(path, chunksize=chunksize)
+    elif extension == '.tsv':
+        chunks = pd.read_csv(path, sep='\t', chunksize=chunksize)
+    elif extension == '.jsonl':
+        chunks = pd.read_json(path, lines=True, chunksize=chunksize)
+    elif extension == '.parquet':
+        chunks = _iter_parquet(path, chunksize)
+    elif extension == '.json':
+        chunks = _slice_frame(pd.read_json(path), chunksize)
+    elif extension == '.xlsx':
+        chunks = _slice_frame(pd.read_excel(path), chunksize)
+    else:
+        raise ValueError(f"Unsupported file format: {extension}")
+
+    return rename_chunks(instrument_chunks('read_file', chunks), instruction_name, input_name, response_name)
+
+
+# Lê o conteúdo de um dcc.Upload em blocos. O base64 é decodificado para bytes uma única vez
+# e lido direto do buffer, sem criar uma cópia em string nem o DataFrame inteiro.
+def iter_upload_chunks(contents, chunksize=DEFAULT_CHUNKSIZE, instruction_name=None, input_name=None, response_name=None):
+    content_type, content_string = contents.split(',', 1)
+    buffer = io.BytesIO(base64.b64decode(content_string))
+
+    if 'csv' in content_type:
+        chunks = pd.read_csv(buffer, chunksize=chunksize)
+    elif 'tab-separated' in content_type:
+        chunks = pd.read_csv(buffer, sep='\t', chunksize=chunksize)
+    elif 'excel' in content_type or 'spreadsheet' in content_type:
+        chunks = _slice_frame(pd.read_excel(buffer), chunksize)
+    elif 'json' in content_type:
+        if _is_json_lines(buffer):
+            chunks = pd.read_json(buffer, lines=True, chunksize=chunksize)
+        else:
+            chunks = _slice_frame(pd.read_json(buffer), chunksize)
+    else:
+        raise ValueError('Unsupported file format')
+
+    return rename_chunks(instrument_chunks('parse_upload', chunks), instruction_name, input_name, response_name)
+
+
+# Lê o split 'train' de um dataset do Hugging Face em modo streaming, em blocos de chunksize linhas
+def iter_hf_chunks(path, chunksize=DEFAULT_CHUNKSIZE, instruction_name=None, input_name=None, response_name=None):
+    from datasets import load_dataset
+
+    ds = load_dataset(path, split='train', streaming=True)
+
+    def chunks():
+        rows = []
+        for row in ds:
+            rows.append(row)
+            if len(rows) >= chunksize:
+                yield pd.DataFrame(rows)
+                rows = []
+        if rows:
+            yield pd.DataFrame(rows)
+
+    return rename_chunks(instrument_chunks('load_hf_dataset', chunks()), instruction_name, input_name, response_name)
+
+
+# Linhas guardadas no máximo antes de fixar o esquema do Parquet, enquanto alguma coluna só tem nulos
+PARQUET_SCHEMA_ROWS = 100000
+
+
+def _has_values(tables, name):
+    return any(table.column(name).null_count < len(table) for table in tables)
+
+
+# Esquema do arquivo Parquet: o tipo de cada coluna vem do primeiro bloco em que ela tem algum valor
+# (um bloco só com textos vazios chega do read_csv como float). Colunas sem nenhum valor ficam com
+# o tipo do primeiro bloco, e as de tipo nulo (ex.: nenhum padrão encontrado) viram texto.
+def _parquet_schema(tables):
+    import pyarrow as pa
+
+    fields = []
+    for field in tables[0].schema:
+        typed = next((table.schema.field(field.name) for table in tables if _has_values([table], field.name)), field)
+        fields.append(typed.with_type(pa.large_string()) if pa.types.is_null(typed.type) else typed)
+    return pa.schema(fields)
+
+
+# Grava o Parquet bloco a bloco com um ParquetWriter. Os blocos são convertidos para o esquema fixado
+# (ex.: contagens inteiras que vieram como float por causa de um texto vazio voltam a int64, com nulo
+# no lugar do NaN). Só os primeiros blocos ficam em memória, enquanto alguma coluna não tem valores.
+def _write_parquet_chunks(chunks, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    pending = []
+    rows = 0
+
+    def write(table):
+        writer.write_table(table.select(writer.schema.names).cast(writer.schema))
+
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False).replace_schema_metadata(None)
+            rows += len(chunk)
+            if writer is not None:
+                write(table)
+                continue
+
+            pending.append(table)
+            if sum(len(table) for table in pending) < PARQUET_SCHEMA_ROWS and not all(_has_values(pending, name) for name in table.schema.names):
+                continue
+            writer = pq.ParquetWriter(path, _parquet_schema(pending))
+            for table in pending:
+                write(table)
+            pending = []
+
+        if pending:
+            writer = pq.ParquetWriter(path, _parquet_schema(pending))
+            for table in pending:
+                write(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        pd.DataFrame().to_parquet(path, index=False)
+    return rows
+
+
+# Grava blocos em um arquivo. CSV, TSV, JSONL e Parquet são gravados bloco a bloco, sem juntar o
+# resultado em memória; JSON (array) e Excel não permitem acrescentar blocos e são gravados ao final.
+def write_dataset_chunks(chunks, path):
+    extension = os.path.splitext(path)[1].lower()
+    rows = 0
+
+    if extension == '.parquet':
+        return _write_parquet_chunks(chunks, path)
+
+    if extension in ('.csv', '.tsv', '.jsonl'):
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            for index, chunk in enumerate(chunks):
+                if extension == '.jsonl':
+                    chunk.to_json(f, orient='records', lines=True, force_ascii=False)
+                else:
+                    chunk.to_csv(f, sep='\t' if extension == '.tsv' else ',', index=False, header=index == 0)
+                rows += len(chunk)
+        return rows
+
+    parts = list(chunks)
+    df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    write_dataset(df, path)
+    return len(df)
+
+
+def read_dataset(path, instruction_name=None, input_name=None, response_name=None):
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == '.csv':
+        df = pd.read_csv(path)
+    elif extension == '.tsv':
+        df = pd.read_csv(path, sep='\t')
+    elif extension == '.json':
+        df = pd.read_json(path)
+    elif extension == '.jsonl':
+        df = pd.read_json(path, lines=True)
+    elif extension == '.parquet':
+        df = pd.read_parquet(path)
+    elif extension == '.xlsx':
+        df = pd.read_excel(path)
+    else:
+        raise ValueError(f"Unsupported file format: {extension}")
+
+    return rename_columns(df, instruction_name, input_name, response_name)
+
+
+def write_dataset(df, path):
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == '.csv':
+        df.to_csv(path, index=False)
+    elif extension == '.tsv':
+        df.to_csv(path, sep='\t', index=False)
+    elif extension == '.json':
+        df.to_json(path, orient='records', force_ascii=False)
+    elif extension == '.jsonl':
+        df.to_json(path, orient='records', lines=True, force_ascii=False)
+    elif extension == '.parquet':
+        df.to_parquet(path, index=False)
+    elif extension == '.xlsx':
+        df.to_excel(path, index=False)
+    else:
+        raise ValueError(f"Unsupported file format: {extension}")
@@ -0,0 +1,126 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from metrics.parallel import CPU_BOUND_ANALYZERS, create_process_pool, map_chunks
+from progress import ProgressTracker, prune_progress, read_progress
+
+# Quantidade de linhas enviadas ao analisador em cada passo do job
+DEFAULT_CHUNK_SIZE = 64
+
+# Jobs finalizados ficam disponíveis por este tempo (em segundos) antes de serem descartados
+FINISHED_JOB_TTL = 3600
+
+
+# Estado de um job de análise executado no servidor. O progresso (vazão por média móvel
+# exponencial, ETA e o arquivo compartilhado entre workers) vem do ProgressTracker.
+class Job(ProgressTracker):
+    def progress(self):
+        return self.snapshot()
+
+
+# Executa as análises em threads de background, um job por analisador,
+# processando o dataset inteiro em blocos em vez de uma linha por tick do dcc.Interval.
+# A entrada é um iterável de DataFrames (ex.: as partes de um dataset no ResultStore),
+# então o dataset não precisa estar inteiro em memória.
+# Com process_workers > 1, os analisadores limitados pela CPU (CPU_BOUND_ANALYZERS) são executados
+# em um pool de processos compartilhado entre os jobs, com os resultados na ordem original.
+class JobManager:
+    def __init__(self, max_workers=4, chunk_size=DEFAULT_CHUNK_SIZE, process_workers=0):
+        self.chunk_size = chunk_size
+        self.process_workers = process_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis-job')
+        self._process_pool = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _get_process_pool(self):
+        with self._lock:
+            if self._process_pool is None:
+                self._process_pool = create_process_pool(self.process_workers)
+            return self._process_pool
+
+    # on_result recebe o iterador com os blocos de resultado e devolve o que fica guardado em
+    # job.result (por exemplo, o handle do resultado gravado em blocos no ResultStore).
+    # Sem on_result, os blocos são concatenados em um único DataFrame.
+    def submit(self, name, chunks, total, make_analyzer, analyze_kwargs=None, on_result=None):
+        self._prune()
+        job = Job(uuid.uuid4().hex, name, total)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, chunks, make_analyzer, analyze_kwargs or {}, on_result)
+        return job.id
+
+    def _split(self, chunks):
+        for part in chunks:
+            for start in range(0, len(part), self.chunk_size):
+                yield part.iloc[start:start + self.chunk_size].copy()
+
+    def _analyze_chunks(self, job, chunks, make_analyzer, analyze_kwargs):
+        if self.process_workers > 1 and job.name in CPU_BOUND_ANALYZERS:
+            results = map_chunks(
+                self._split(chunks),
+                [job.name],
+                kwargs_by_name={job.name: analyze_kwargs},
+                workers=self.process_workers,
+                executor=self._get_process_pool()
+            )
+        else:
+            analyzer = make_analyzer()
+            results = (analyzer.analyze(chunk, **analyze_kwargs) for chunk in self._split(chunks))
+
+        for result in results:
+            job.advance(len(result))
+            yield result
+
+    def _run(self, job, chunks, make_analyzer, analyze_kwargs, on_result):
+        job.start()
+        try:
+            results = self._analyze_chunks(job, chunks, make_analyzer, analyze_kwargs)
+            if on_result is not None:
+                result = on_result(results)
+            else:
+                parts = list(results)
+                result = pd.concat(parts) if parts else pd.DataFrame()
+            job.finish(result)
+            print(f"Job {job.id} ({job.name}) finished: {job.total} rows.")
+        except Exception as e:
+            print(f"Error in job {job.id} ({job.name}): {str(e)}")
+            job.fail(str(e))
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    # Jobs de outro worker do servidor são lidos do arquivo de progresso gravado por ele
+    def progress(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            return job.progress()
+        state = read_progress(job_id)
+        if state is None:
+            return None
+        state.pop('result', None)
+        state.pop('updated_at', None)
+        return state
+
+    def result(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            return job.result
+        state = read_progress(job_id)
+        return state.get('result') if state is not None else None
+
+    def _prune(self):
+        now = time.time()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished_at is not None and now - job.finished_at > FINISHED_JOB_TTL
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        prune_progress(FINISHED_JOB_TTL)
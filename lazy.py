@@ -0,0 +1,18 @@
+import importlib.util
+import sys
+
+# Importação sob demanda: o módulo devolvido só é executado no primeiro acesso a um atributo.
+# Usado pelo app para que bibliotecas pesadas (plotly, etc.) não entrem no tempo de partida.
+def lazy_import(name):
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,89 @@
+from metrics.cache import get_cache
+from metrics.instrumentation import instrument_analyze, record_cache, record_texts
+
+
+# Divide uma sequência em blocos de tamanho fixo, preservando a ordem
+def iter_chunks(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+# Classe base dos analisadores: o processamento em lote e o cache por texto ficam aqui e cada
+# analisador implementa apenas _analyze_chunk, que recebe um bloco de textos e devolve um resultado por texto
+class BatchAnalyzer:
+    name = None
+    default_batch_size = 32
+
+    # Incrementar quando a forma de calcular o resultado mudar, para invalidar o cache
+    cache_version = 1
+
+    # O analyze de cada analisador é instrumentado automaticamente (latência, linhas, erros)
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if 'analyze' in cls.__dict__:
+            cls.analyze = instrument_analyze(cls.analyze)
+
+    # Configuração da instância que altera os resultados (modelo, arquivo de padrões, etc.)
+    def cache_config(self):
+        return ''
+
+    # Resultados que dependem de algo fora do texto (ex.: um tempo limite estourado) não são guardados
+    def cacheable(self, value):
+        return True
+
+    def cache_namespace(self, kwargs):
+        options = ','.join(f"{key}={value!r}" for key, value in sorted(kwargs.items()))
+        return f"{self.name}:v{self.cache_version}:{self.cache_config()}:{options}"
+
+    def analyze_batch(self, texts, batch_size=None, **kwargs):
+        batch_size = batch_size or self.default_batch_size
+        texts = list(texts)
+        record_texts(self.name, texts)
+        cache = get_cache()
+        if cache is None:
+            return self._compute(texts, batch_size, kwargs)
+
+        namespace = self.cache_namespace(kwargs)
+        results = [None] * len(texts)
+
+        # Apenas strings entram no cache; valores ausentes (None/NaN) são sempre recalculados
+        cacheable = [position for position, text in enumerate(texts) if isinstance(text, str)]
+        found = cache.get_many(namespace, [texts[position] for position in cacheable])
+        found_positions = set()
+        for index, value in found.items():
+            results[cacheable[index]] = value
+            found_positions.add(cacheable[index])
+        record_cache(self.name, len(found_positions), len(texts) - len(found_positions))
+
+        # Textos repetidos dentro do lote são calculados uma única vez
+        pending = {}
+        uncacheable = []
+        for position, text in enumerate(texts):
+            if position in found_positions:
+                continue
+            if isinstance(text, str):
+                pending.setdefault(text, []).append(position)
+            else:
+                uncacheable.append(position)
+
+        pending_texts = list(pending)
+        computed = self._compute(pending_texts + [texts[position] for position in uncacheable], batch_size, kwargs)
+
+        for text, value in zip(pending_texts, computed):
+            for position in pending[text]:
+                results[position] = value
+        for position, value in zip(uncacheable, computed[len(pending_texts):]):
+            results[position] = value
+
+        cache.put_many(namespace, [(text, value) for text, value in zip(pending_texts, computed) if self.cacheable(value)])
+        return results
+
+    def _compute(self, texts, batch_size, kwargs):
+        results = []
+        for chunk in iter_chunks(texts, batch_size):
+            results.extend(self._analyze_chunk(chunk, **kwargs))
+        return results
+
+    def _analyze_chunk(self, texts, **kwargs):
+        raise NotImplementedError
@@ -0,0 +1,183 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+# Cache persistente dos resultados por texto, compartilhado entre analisadores, sessões e processos
+DEFAULT_CACHE_PATH = os.environ.get(
+    'TEXT_ANALYSIS_CACHE_PATH',
+    os.path.join(os.path.expanduser('~'), '.cache', 'text-analysis', 'results.sqlite')
+)
+DEFAULT_MAX_BYTES = int(os.environ.get('TEXT_ANALYSIS_CACHE_MAX_BYTES', 512 * 2**20))
+
+# Ao passar do limite, as entradas menos usadas são removidas até sobrar esta fração do limite
+EVICTION_TARGET = 0.9
+
+# Quantas escritas entre recontagens do tamanho real do cache no disco
+SIZE_REFRESH_INTERVAL = 100
+
+
+def text_key(namespace, text):
+    digest = hashlib.sha256()
+    digest.update(namespace.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(text.encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+# Cache LRU em SQLite, limitado em bytes. A chave é o hash de (analisador, versão/config, texto).
+class ResultCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._total_bytes = None
+        self._writes = 0
+        self._hits = {}
+        self._misses = {}
+
+    def _connection(self):
+        # A conexão é recriada em processos filhos (ex.: workers do process pool)
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+            self._conn.commit()
+            self._pid = os.getpid()
+            self._total_bytes = None
+        return self._conn
+
+    # Retorna {posição: valor} para os textos encontrados no cache
+    def get_many(self, namespace, texts):
+        keys = [text_key(namespace, text) for text in texts]
+        found = {}
+        with self._lock:
+            conn = self._connection()
+            rows = {}
+            unique_keys = list(dict.fromkeys(keys))
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                for key, value in conn.execute(f'SELECT key, value FROM entries WHERE key IN ({placeholders})', batch):
+                    rows[key] = value
+
+            if rows:
+                now = time.time()
+                conn.executemany('UPDATE entries SET accessed = ? WHERE key = ?', [(now, key) for key in rows])
+                conn.commit()
+
+            for position, key in enumerate(keys):
+                if key in rows:
+                    found[position] = pickle.loads(rows[key])
+
+            self._hits[namespace] = self._hits.get(namespace, 0) + len(found)
+            self._misses[namespace] = self._misses.get(namespace, 0) + len(keys) - len(found)
+        return found
+
+    def put_many(self, namespace, items):
+        now = time.time()
+        entries = []
+        for text, value in items:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            entries.append((text_key(namespace, text), blob, len(blob), now))
+        if not entries:
+            return
+
+        with self._lock:
+            conn = self._connection()
+            conn.executemany('INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)', entries)
+            conn.commit()
+
+            self._writes += 1
+            if self._total_bytes is None or self._writes % SIZE_REFRESH_INTERVAL == 0:
+                self._total_bytes = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+            else:
+                self._total_bytes += sum(entry[2] for entry in entries)
+
+            if self._total_bytes > self.max_bytes:
+                self._evict(conn)
+
+    def _evict(self, conn):
+        target = self.max_bytes * EVICTION_TARGET
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        removed = []
+        for key, size in conn.execute('SELECT key, size FROM entries ORDER BY accessed'):
+            if total <= target:
+                break
+            removed.append((key,))
+            total -= size
+        conn.executemany('DELETE FROM entries WHERE key = ?', removed)
+        conn.commit()
+        self._total_bytes = total
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute('DELETE FROM entries')
+            conn.commit()
+            self._total_bytes = 0
+
+    # Taxa de acerto por analisador desde o início do processo, mais o tamanho atual do cache
+    def stats(self):
+        with self._lock:
+            conn = self._connection()
+            entries, total_bytes = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+            namespaces = {}
+            for namespace in set(self._hits) | set(self._misses):
+                hits = self._hits.get(namespace, 0)
+                misses = self._misses.get(namespace, 0)
+                namespaces[namespace] = {
+                    'hits': hits,
+                    'misses': misses,
+                    'hit_rate': hits / (hits + misses) if hits + misses else 0.0
+                }
+            return {
+                'path': self.path,
+                'entries': entries,
+                'bytes': total_bytes,
+                'max_bytes': self.max_bytes,
+                'namespaces': namespaces
+            }
+
+
+_default_cache = None
+_enabled = os.environ.get('TEXT_ANALYSIS_CACHE', '1') != '0'
+_config_lock = threading.Lock()
+
+
+def configure(path=None, max_bytes=None, enabled=True):
+    global _default_cache, _enabled
+    with _config_lock:
+        _enabled = enabled
+        _default_cache = ResultCache(path or DEFAULT_CACHE_PATH, max_bytes or DEFAULT_MAX_BYTES) if enabled else None
+
+
+# Configuração atual, no formato aceito por configure (usada para repassar o cache a outros processos)
+def settings():
+    cache = get_cache()
+    if cache is None:
+        return {'enabled': False}
+    return {'path': cache.path, 'max_bytes': cache.max_bytes, 'enabled': True}
+
+
+# Cache usado pelos analisadores; None quando o cache está desabilitado
+def get_cache():
+    global _default_cache
+    if not _enabled:
+        return None
+    with _config_lock:
+        if _default_cache is None:
+            _default_cache = ResultCache()
+        return _default_cache
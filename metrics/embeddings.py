@@ -0,0 +1,244 @@
+import contextlib
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+# Armazém de embeddings compartilhado entre os analisadores de similaridade (refusal, prompt, topics)
+# e entre processos: cada texto é codificado uma única vez por modelo. Os vetores ficam em um
+# arquivo float32 mapeado em memória (np.memmap), uma linha por texto, e um índice SQLite guarda
+# hash do texto -> linha. As linhas só aparecem no índice depois que o vetor foi gravado no arquivo.
+# O arquivo é limitado em bytes (TEXT_ANALYSIS_EMBEDDINGS_MAX_BYTES): ao encher, os textos usados
+# há mais tempo são removidos e as linhas deles são reaproveitadas, então o arquivo não passa do limite.
+DEFAULT_EMBEDDINGS_PATH = os.environ.get(
+    'TEXT_ANALYSIS_EMBEDDINGS_PATH',
+    os.path.join(os.path.expanduser('~'), '.cache', 'text-analysis', 'embeddings')
+)
+DEFAULT_MAX_BYTES = int(os.environ.get('TEXT_ANALYSIS_EMBEDDINGS_MAX_BYTES', 256 * 2**20))
+ENABLED = os.environ.get('TEXT_ANALYSIS_EMBEDDINGS', '1') != '0'
+
+# Ao encher, os textos menos usados são removidos até sobrar esta fração das linhas
+EVICTION_TARGET = 0.9
+
+# O arquivo de vetores cresce de tantas linhas por vez, para não remapear a cada lote
+GROWTH_ROWS = 4096
+
+
+def embedding_key(text):
+    return hashlib.sha256(text.encode('utf-8', 'surrogatepass')).digest()
+
+
+class EmbeddingStore:
+    def __init__(self, model_name, path=DEFAULT_EMBEDDINGS_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        slug = re.sub(r'[^\w.-]+', '_', model_name)
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self.vectors_path = os.path.join(path, f'{slug}.f32')
+        self.index_path = os.path.join(path, f'{slug}.sqlite')
+        self.dimension = None
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._array = None
+
+    def _connection(self):
+        # A conexão é recriada em processos filhos (ex.: workers do process pool)
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            self._conn = sqlite3.connect(self.index_path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)')
+            self._conn.execute('BEGIN IMMEDIATE')
+            # Armazéns do formato anterior (tabela rows, sem limite) são descartados
+            if self._conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rows'").fetchone():
+                self._conn.execute('DROP TABLE rows')
+                self._conn.execute("DELETE FROM meta WHERE name = 'next_row'")
+                if os.path.exists(self.vectors_path):
+                    os.truncate(self.vectors_path, 0)
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries (key BLOB PRIMARY KEY, row INTEGER NOT NULL, accessed REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+            # Linhas liberadas pela remoção, reaproveitadas antes de crescer o arquivo
+            self._conn.execute('CREATE TABLE IF NOT EXISTS free (row INTEGER PRIMARY KEY)')
+            self._conn.execute('COMMIT')
+            self._pid = os.getpid()
+            self._array = None
+        if self.dimension is None:
+            # A dimensão é gravada por quem armazena o primeiro vetor, talvez outro processo
+            found = self._conn.execute("SELECT value FROM meta WHERE name = 'dimension'").fetchone()
+            self.dimension = int(found[0]) if found else None
+        return self._conn
+
+    def _capacity(self):
+        return max(1, self.max_bytes // (self.dimension * 4))
+
+    # Mapeia o arquivo com pelo menos n_rows linhas, aumentando-o se preciso (até a capacidade)
+    def _vectors(self, n_rows):
+        if self._array is not None and len(self._array) >= n_rows:
+            return self._array
+
+        row_bytes = self.dimension * 4
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        if size < n_rows * row_bytes:
+            size = max(min(n_rows + GROWTH_ROWS, self._capacity()), n_rows) * row_bytes
+            with open(self.vectors_path, 'ab') as f:
+                f.truncate(size)
+        self._array = np.memmap(self.vectors_path, dtype=np.float32, mode='r+', shape=(size // row_bytes, self.dimension))
+        return self._array
+
+    # Linhas dos textos já armazenados: {chave: linha}
+    def _lookup(self, conn, keys):
+        rows = {}
+        unique_keys = list(dict.fromkeys(keys))
+        for start in range(0, len(unique_keys), 500):
+            batch = unique_keys[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            for key, row in conn.execute(f'SELECT key, row FROM entries WHERE key IN ({placeholders})', batch):
+                rows[key] = row
+        return rows
+
+    # Devolve os embeddings dos textos (uma linha por texto), chamando encode(textos) apenas para
+    # os que ainda não estão no armazém
+    def get_or_encode(self, texts, encode):
+        if len(texts) == 0:
+            return np.asarray(encode(texts), dtype=np.float32)
+
+        keys = [embedding_key(text) for text in texts]
+        with self._lock:
+            stored = self._lookup(self._connection(), keys)
+
+        fresh = {}
+        pending = list(dict.fromkeys(text for text, key in zip(texts, keys) if key not in stored))
+        if pending:
+            vectors = np.asarray(encode(pending), dtype=np.float32)
+            fresh = {embedding_key(text): vector for text, vector in zip(pending, vectors)}
+            self._add(pending, vectors)
+
+        # A leitura acontece na mesma transação que a consulta: uma linha não pode ser removida e
+        # reaproveitada por outro processo entre achar a linha e copiar o vetor
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = self._lookup(conn, keys)
+                if rows:
+                    now = time.time()
+                    conn.executemany('UPDATE entries SET accessed = ? WHERE key = ?', [(now, key) for key in rows])
+                    array = self._vectors(max(rows.values()) + 1)
+                    found = {key: np.array(array[row]) for key, row in rows.items()}
+                else:
+                    found = {}
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+
+        # Textos removidos por outro processo no meio do caminho são codificados de novo, sem guardar
+        evicted = list(dict.fromkeys(text for text, key in zip(texts, keys) if key not in found and key not in fresh))
+        if evicted:
+            fresh.update(zip((embedding_key(text) for text in evicted), np.asarray(encode(evicted), dtype=np.float32)))
+        return np.stack([found[key] if key in found else fresh[key] for key in keys])
+
+    # Reserva n linhas: primeiro as liberadas, depois o fim do arquivo e, se faltar, remove os
+    # textos usados há mais tempo até sobrar EVICTION_TARGET da capacidade
+    def _allocate(self, conn, n):
+        capacity = self._capacity()
+        rows = [row for (row,) in conn.execute('SELECT row FROM free ORDER BY row LIMIT ?', (n,))]
+        conn.executemany('DELETE FROM free WHERE row = ?', [(row,) for row in rows])
+
+        found = conn.execute("SELECT value FROM meta WHERE name = 'next_row'").fetchone()
+        next_row = int(found[0]) if found else 0
+        tail = max(0, min(n - len(rows), capacity - next_row))
+        rows.extend(range(next_row, next_row + tail))
+        conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('next_row', ?)", (str(next_row + tail),))
+
+        missing = n - len(rows)
+        if missing:
+            count = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+            n_evict = min(count, max(missing, count + missing - int(capacity * EVICTION_TARGET)))
+            evicted = conn.execute('SELECT key, row FROM entries ORDER BY accessed LIMIT ?', (n_evict,)).fetchall()
+            conn.executemany('DELETE FROM entries WHERE key = ?', [(key,) for key, _ in evicted])
+            freed = [row for _, row in evicted]
+            rows.extend(freed[:missing])
+            conn.executemany('INSERT INTO free (row) VALUES (?)', [(row,) for row in freed[missing:]])
+        return rows
+
+    def _add(self, texts, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            conn = self._connection()
+            # BEGIN IMMEDIATE serializa a reserva de linhas entre processos
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                if self.dimension is None:
+                    self.dimension = vectors.shape[1]
+                    conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('dimension', ?)", (str(self.dimension),))
+
+                stored = self._lookup(conn, [embedding_key(text) for text in texts])
+                new = [(embedding_key(text), vector) for text, vector in zip(texts, vectors) if embedding_key(text) not in stored]
+                # Um lote maior que o armazém inteiro guarda só o que cabe
+                new = new[:self._capacity()]
+                if new:
+                    rows = self._allocate(conn, len(new))
+                    array = self._vectors(max(rows) + 1)
+                    array[rows] = np.stack([vector for _, vector in new])
+                    array.flush()
+                    now = time.time()
+                    conn.executemany('INSERT INTO entries (key, row, accessed) VALUES (?, ?, ?)', [
+                        (key, row, now) for row, (key, _) in zip(rows, new)
+                    ])
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+
+    def stats(self):
+        with self._lock:
+            conn = self._connection()
+            count = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        return {
+            'model': self.model_name,
+            'path': self.vectors_path,
+            'texts': count,
+            'dimension': self.dimension,
+            'bytes': os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0,
+            'max_bytes': self.max_bytes
+        }
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+_local = threading.local()
+
+
+# Dentro do bloco, get_store devolve None nesta thread e os textos vão direto ao modelo (usado na
+# calibração do aquecimento, que precisa medir o modelo e não a leitura do armazém)
+@contextlib.contextmanager
+def bypass_store():
+    previous = getattr(_local, 'bypass', False)
+    _local.bypass = True
+    try:
+        yield
+    finally:
+        _local.bypass = previous
+
+
+# Armazém do modelo; None quando desabilitado (TEXT_ANALYSIS_EMBEDDINGS=0) ou contornado (bypass_store)
+def get_store(model_name):
+    if not ENABLED or getattr(_local, 'bypass', False):
+        return None
+    with _stores_lock:
+        if model_name not in _stores:
+            _stores[model_name] = EmbeddingStore(model_name)
+        return _stores[model_name]
+
+
+def stores_stats():
+    with _stores_lock:
+        stores = list(_stores.values())
+    return {'enabled': ENABLED, 'stores': [store.stats() for store in stores]}
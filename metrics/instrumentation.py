@@ -0,0 +1,243 @@
+import functools
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+# Instrumentação do caminho quente: latência de cada chamada analyze dos analisadores e de cada
+# etapa de leitura dos datasets, linhas processadas, linhas/s, tamanho dos textos e acertos do
+# cache de resultados. Tudo fica em memória no processo e é exposto no formato de texto do
+# Prometheus (render_prometheus), servido pelo app em /metrics.
+# Workers do pool de processos têm as próprias contagens, que não aparecem no processo do app.
+
+ENABLED = os.environ.get('TEXT_ANALYSIS_INSTRUMENTATION', '1') != '0'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TEXT_LENGTH_BUCKETS = (0, 16, 64, 256, 1024, 4096, 16384, 65536)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+# Métrica com uma série por combinação de valores dos rótulos
+class Metric:
+    kind = None
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} {self.kind}']
+
+    def series(self):
+        with self._lock:
+            return {key: self._copy(value) for key, value in self._series.items()}
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def value(self, labels):
+        with self._lock:
+            return self._series.get(labels, 0)
+
+    def render(self):
+        return self.header() + [
+            f'{self.name}{_format_labels(self.labels, key)} {_format_value(value)}'
+            for key, value in sorted(self.series().items())
+        ]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, labels, value):
+        with self._lock:
+            self._series[labels] = value
+
+
+# Histograma cumulativo, como o do Prometheus: contagem por limite superior, soma e total
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = np.asarray(buckets, dtype=float)
+
+    def _state(self, labels):
+        state = self._series.get(labels)
+        if state is None:
+            state = self._series[labels] = [np.zeros(len(self.buckets) + 1, dtype=np.int64), 0.0]
+        return state
+
+    def observe(self, labels, value):
+        self.observe_many(labels, [value])
+
+    # Várias observações de uma vez (ex.: o tamanho de cada texto de um lote)
+    def observe_many(self, labels, values):
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return
+        counts = np.bincount(np.searchsorted(self.buckets, values, side='left'), minlength=len(self.buckets) + 1)
+        with self._lock:
+            state = self._state(labels)
+            state[0] += counts
+            state[1] += float(values.sum())
+
+    @staticmethod
+    def _copy(value):
+        return [value[0].copy(), value[1]]
+
+    def render(self):
+        lines = self.header()
+        for key, (counts, total) in sorted(self.series().items()):
+            cumulative = np.cumsum(counts)
+            for bound, count in zip(list(self.buckets) + [math.inf], cumulative):
+                lines.append(f'{self.name}_bucket{_format_labels(self.labels, key, [("le", _format_value(bound))])} {int(count)}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.labels, key)} {int(cumulative[-1])}')
+        return lines
+
+
+ANALYZER_SECONDS = Histogram(
+    'text_analysis_analyzer_duration_seconds', 'Latency of each analyzer analyze() call.', ('analyzer',)
+)
+ANALYZER_ROWS = Counter('text_analysis_analyzer_rows_total', 'Rows processed by each analyzer.', ('analyzer',))
+ANALYZER_ERRORS = Counter('text_analysis_analyzer_errors_total', 'analyze() calls that raised an error.', ('analyzer',))
+ANALYZER_THROUGHPUT = Gauge(
+    'text_analysis_analyzer_rows_per_second', 'Rows per second of the latest analyze() call.', ('analyzer',)
+)
+TEXT_LENGTH = Histogram(
+    'text_analysis_text_length_chars', 'Length in characters of the texts sent to each analyzer.',
+    ('analyzer',), buckets=TEXT_LENGTH_BUCKETS
+)
+CACHE_REQUESTS = Counter(
+    'text_analysis_cache_requests_total', 'Result cache lookups per analyzer, by result (hit or miss).',
+    ('analyzer', 'result')
+)
+CACHE_HIT_RATIO = Gauge('text_analysis_cache_hit_ratio', 'Result cache hit ratio per analyzer since start.', ('analyzer',))
+INGESTION_SECONDS = Histogram(
+    'text_analysis_ingestion_duration_seconds', 'Latency of each ingestion step, per chunk.', ('step',)
+)
+INGESTION_ROWS = Counter('text_analysis_ingestion_rows_total', 'Rows read or prepared by each ingestion step.', ('step',))
+INGESTION_THROUGHPUT = Gauge(
+    'text_analysis_ingestion_rows_per_second', 'Rows per second of the latest chunk of each ingestion step.', ('step',)
+)
+
+METRICS = (
+    ANALYZER_SECONDS, ANALYZER_ROWS, ANALYZER_ERRORS, ANALYZER_THROUGHPUT, TEXT_LENGTH,
+    CACHE_REQUESTS, CACHE_HIT_RATIO, INGESTION_SECONDS, INGESTION_ROWS, INGESTION_THROUGHPUT
+)
+
+
+def _record(seconds_metric, rows_metric, throughput_metric, labels, seconds, rows):
+    seconds_metric.observe(labels, seconds)
+    rows_metric.inc(labels, rows)
+    if seconds > 0:
+        throughput_metric.set(labels, rows / seconds)
+
+
+# Envolve o analyze de um analisador: latência, linhas e erros, rotulados pelo nome do analisador
+def instrument_analyze(analyze):
+    if not ENABLED:
+        return analyze
+
+    @functools.wraps(analyze)
+    def wrapper(self, data, *args, **kwargs):
+        labels = (self.name,)
+        start = time.perf_counter()
+        try:
+            result = analyze(self, data, *args, **kwargs)
+        except Exception:
+            ANALYZER_ERRORS.inc(labels)
+            raise
+        _record(ANALYZER_SECONDS, ANALYZER_ROWS, ANALYZER_THROUGHPUT, labels, time.perf_counter() - start, len(data))
+        return result
+
+    return wrapper
+
+
+def record_texts(analyzer, texts):
+    if ENABLED:
+        TEXT_LENGTH.observe_many((analyzer,), [len(text) if isinstance(text, str) else 0 for text in texts])
+
+
+def record_cache(analyzer, hits, misses):
+    if not ENABLED:
+        return
+    CACHE_REQUESTS.inc((analyzer, 'hit'), hits)
+    CACHE_REQUESTS.inc((analyzer, 'miss'), misses)
+    total_hits = CACHE_REQUESTS.value((analyzer, 'hit'))
+    total = total_hits + CACHE_REQUESTS.value((analyzer, 'miss'))
+    if total:
+        CACHE_HIT_RATIO.set((analyzer,), total_hits / total)
+
+
+# Decorador de uma etapa de ingestão que recebe e devolve um DataFrame (ex.: rename_columns)
+def instrument_step(step):
+    def decorator(function):
+        if not ENABLED:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(df, *args, **kwargs):
+            start = time.perf_counter()
+            result = function(df, *args, **kwargs)
+            _record(INGESTION_SECONDS, INGESTION_ROWS, INGESTION_THROUGHPUT, (step,), time.perf_counter() - start, len(result))
+            return result
+
+        return wrapper
+    return decorator
+
+
+# A leitura em streaming só acontece quando os blocos são consumidos, então o tempo de cada
+# bloco é medido na própria iteração
+def instrument_chunks(step, chunks):
+    if not ENABLED:
+        yield from chunks
+        return
+
+    iterator = iter(chunks)
+    while True:
+        start = time.perf_counter()
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        _record(INGESTION_SECONDS, INGESTION_ROWS, INGESTION_THROUGHPUT, (step,), time.perf_counter() - start, len(chunk))
+        yield chunk
+
+
+def render_prometheus():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
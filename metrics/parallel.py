@@ -0,0 +1,73 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from metrics import cache
+from metrics.registry import get_analyzer
+
+# Analisadores em Python puro, limitados pela CPU e pelo GIL: ganham com processos em vez de threads
+CPU_BOUND_ANALYZERS = ('textstat', 'patterns', 'sentiment')
+
+EXECUTOR_MODES = ('auto', 'thread', 'process')
+
+
+# Inicialização de cada processo do pool: aplica a configuração de cache do processo pai
+# e carrega os analisadores uma única vez, antes do primeiro bloco
+def _init_worker(names, cache_settings):
+    cache.configure(**cache_settings)
+    for name in names:
+        get_analyzer(name)
+
+
+def analyze_chunk(chunk, names, batch_size=None, kwargs_by_name=None):
+    kwargs_by_name = kwargs_by_name or {}
+    for name in names:
+        chunk = get_analyzer(name).analyze(chunk, batch_size=batch_size, **kwargs_by_name.get(name, {}))
+    return chunk
+
+
+def resolve_mode(mode, names, workers):
+    if mode != 'auto':
+        return mode
+    if workers > 1 and all(name in CPU_BOUND_ANALYZERS for name in names):
+        return 'process'
+    return 'thread'
+
+
+# Pool de processos com 'spawn', que é seguro mesmo com bibliotecas que criam threads (torch, tokenizers).
+# Os analisadores em names são carregados na inicialização; os demais, no primeiro bloco de cada processo.
+def create_process_pool(workers, names=()):
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(tuple(names), cache.settings())
+    )
+
+
+# Distribui os blocos entre threads ou processos e devolve os resultados na ordem original.
+# No máximo 2 * workers blocos ficam em andamento, então a entrada pode ser um iterador longo.
+# function processa cada bloco (precisa ser importável pelos processos do pool).
+def map_chunks(chunks, names, batch_size=None, kwargs_by_name=None, workers=1, mode='thread', executor=None, function=analyze_chunk):
+    workers = max(workers, 1)
+    owns_executor = executor is None
+    if owns_executor:
+        if mode == 'process':
+            executor = create_process_pool(workers, names)
+        else:
+            # Carrega os analisadores antes de dividir o trabalho entre as threads
+            for name in names:
+                get_analyzer(name)
+            executor = ThreadPoolExecutor(max_workers=workers)
+
+    try:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(function, chunk.copy(), tuple(names), batch_size, kwargs_by_name))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        if owns_executor:
+            executor.shutdown(cancel_futures=True)
@@ -0,0 +1,442 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import regex
+except ImportError:
+    regex = None
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:
+    import sre_constants
+    import sre_parse
+
+# Motor de padrões do RegexAnalyzer. As expressões do arquivo de grupos (pattern_groups.json) são
+# compiladas uma única vez e, na carga, cada uma é analisada para descobrir:
+#   - os caracteres que qualquer ocorrência dela precisa conter (um dígito, um '@', um '.'). Cada
+#     texto é verificado uma vez quanto a esses caracteres e só as expressões que ainda podem casar
+#     são executadas, na ordem do arquivo, com a mesma semântica do langkit (primeiro grupo que
+#     casa em qualquer posição);
+#   - os caracteres com que uma ocorrência pode começar. A expressão é compilada com um lookahead
+#     (?=[...]) na frente, que descarta em um passo as posições que não podem iniciar uma
+#     ocorrência, em vez de avaliar os lookaheads e repetições da expressão em toda posição.
+# Cada arquivo de padrões é compilado uma vez por conteúdo (hash) e observado: quando o arquivo muda
+# no disco, o novo conjunto é compilado e trocado de forma atômica, sem reiniciar o app.
+# Cada texto tem um orçamento de tempo para todas as expressões (TEXT_ANALYSIS_PATTERN_TIME_BUDGET);
+# com o módulo regex instalado a busca é interrompida ao estourar o orçamento, e sem ele as
+# expressões restantes são puladas. O tempo de cada expressão é registrado e, na carga, um linter
+# aponta formas sujeitas a backtracking catastrófico.
+# Uma alternância única com todas as expressões foi medida mais lenta que as buscas separadas no
+# re do CPython (a alternância perde a aceleração por prefixo), e backends do tipo DFA (re2) não
+# suportam os lookaheads e backreferences usados no arquivo.
+
+# Orçamento de tempo (em segundos) para todas as expressões de um mesmo texto; 0 desativa
+DEFAULT_TIME_BUDGET = float(os.environ.get('TEXT_ANALYSIS_PATTERN_TIME_BUDGET', 1.0))
+
+# Resultado de first_match quando o orçamento acabou antes de a resposta estar definida. É diferente
+# de None (nenhum padrão), depende da carga da máquina e por isso nunca vai para o cache.
+TIMED_OUT = '<timed out>'
+
+
+class _Timeout(Exception):
+    pass
+
+DIGIT = 'digit'
+_DIGIT_RE = re.compile(r'\d')
+
+_REPEATS = tuple(
+    getattr(sre_constants, name) for name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT')
+    if hasattr(sre_constants, name)
+)
+
+
+def load_pattern_groups(pattern_file_path):
+    with open(pattern_file_path, 'r') as f:
+        return json.load(f)
+
+
+def _is_digit_class(items):
+    c = sre_constants
+    for op, av in items:
+        if op is c.CATEGORY and av is c.CATEGORY_DIGIT:
+            continue
+        if op is c.RANGE and 48 <= av[0] and av[1] <= 57:
+            continue
+        if op is c.LITERAL and chr(av).isdecimal():
+            continue
+        return False
+    return True
+
+
+def _required(items, ignore_case):
+    c = sre_constants
+    atoms = set()
+    for op, av in items:
+        if op is c.LITERAL:
+            char = chr(av)
+            if char.isdecimal():
+                atoms.add(DIGIT)
+            if not ignore_case:
+                atoms.add(char)
+        elif op is c.IN:
+            if _is_digit_class(av):
+                atoms.add(DIGIT)
+        elif op in _REPEATS:
+            if av[0] >= 1:
+                atoms |= _required(av[2], ignore_case)
+        elif op is c.SUBPATTERN:
+            atoms |= _required(av[3], ignore_case or bool(av[1] & c.SRE_FLAG_IGNORECASE))
+        elif op is getattr(c, 'ATOMIC_GROUP', None):
+            atoms |= _required(av, ignore_case)
+        elif op is c.BRANCH:
+            branches = [_required(branch, ignore_case) for branch in av[1]]
+            atoms |= set.intersection(*branches) if branches else set()
+    return atoms
+
+
+# Caracteres que qualquer ocorrência da expressão precisa conter: DIGIT (qualquer dígito) ou um
+# caractere literal. Um texto sem algum deles não pode casar com a expressão.
+def required_atoms(expression):
+    parsed = sre_parse.parse(expression)
+    return frozenset(_required(parsed.data, bool(parsed.state.flags & re.IGNORECASE)))
+
+
+def _first(items, ignore_case):
+    c = sre_constants
+    chars = set()
+    for op, av in items:
+        if op in (c.AT, c.ASSERT, c.ASSERT_NOT):
+            continue
+        if op is c.LITERAL:
+            if ignore_case:
+                return None, False
+            chars.add(DIGIT if chr(av).isdecimal() else chr(av))
+            return chars, False
+        if op is c.IN:
+            if _is_digit_class(av):
+                chars.add(DIGIT)
+            elif not ignore_case and all(item_op is c.LITERAL for item_op, _ in av):
+                chars.update(chr(value) for _, value in av)
+            else:
+                return None, False
+            return chars, False
+
+        if op in _REPEATS:
+            sub_chars, nullable = _first(av[2], ignore_case)
+            nullable = nullable or av[0] == 0
+        elif op is c.SUBPATTERN:
+            sub_chars, nullable = _first(av[3], ignore_case or bool(av[1] & c.SRE_FLAG_IGNORECASE))
+        elif op is c.BRANCH:
+            sub_chars, nullable = set(), False
+            for branch in av[1]:
+                branch_chars, branch_nullable = _first(branch, ignore_case)
+                if branch_chars is None:
+                    return None, False
+                sub_chars |= branch_chars
+                nullable = nullable or branch_nullable
+        else:
+            return None, False
+
+        if sub_chars is None:
+            return None, False
+        chars |= sub_chars
+        if not nullable:
+            return chars, False
+    return chars, True
+
+
+# Caracteres com que qualquer ocorrência da expressão começa (DIGIT para qualquer dígito), ou None
+# quando não dá para determinar ou a expressão pode casar com o texto vazio
+def first_chars(expression):
+    parsed = sre_parse.parse(expression)
+    chars, nullable = _first(parsed.data, bool(parsed.state.flags & re.IGNORECASE))
+    if chars is None or nullable or not chars:
+        return None
+    return frozenset(chars)
+
+
+# Compila a expressão com o lookahead dos caracteres iniciais; o grupo não capturante mantém a
+# numeração dos grupos, então posições e backreferences não mudam
+def compile_guarded(expression):
+    compiled = re.compile(expression)
+    chars = first_chars(expression)
+    if chars is None:
+        return compiled
+    members = ''.join('\\d' if char == DIGIT else re.escape(char) for char in sorted(chars))
+    try:
+        guarded = re.compile(f"(?=[{members}])(?:{expression})")
+    except re.error:
+        return compiled
+    return guarded if guarded.groups == compiled.groups else compiled
+
+
+def _max_repeat(value):
+    return 'inf' if value == sre_constants.MAXREPEAT else value
+
+
+def _lint(items, enclosing, messages):
+    c = sre_constants
+    for op, av in items:
+        if op in _REPEATS:
+            low, high, sub = av
+            if enclosing is not None and low != high:
+                outer_low, outer_high = enclosing
+                unbounded = high == c.MAXREPEAT and outer_high == c.MAXREPEAT
+                messages.append(
+                    f"{'high' if unbounded else 'medium'}: variable quantifier {{{low},{_max_repeat(high)}}} nested in "
+                    f"quantifier {{{outer_low},{_max_repeat(outer_high)}}} can backtrack heavily on long inputs"
+                )
+            # Só repetições que podem ocorrer mais de uma vez multiplicam as formas de casar o corpo
+            _lint(sub, (low, high) if high > 1 else enclosing, messages)
+        elif op is c.SUBPATTERN:
+            _lint(av[3], enclosing, messages)
+        elif op is c.BRANCH:
+            for branch in av[1]:
+                _lint(branch, enclosing, messages)
+        elif op in (c.ASSERT, c.ASSERT_NOT):
+            _lint(av[1], enclosing, messages)
+        elif op is getattr(c, 'ATOMIC_GROUP', None):
+            _lint(av, enclosing, messages)
+
+
+# Formas com risco de backtracking catastrófico: quantificadores variáveis dentro de outro
+# quantificador que repete, como (\d{4}[- ]?){2,3} ou (?:\s+[A-Za-z]+)*. 'high' quando os dois
+# são ilimitados.
+def lint_expression(expression):
+    messages = []
+    _lint(sre_parse.parse(expression).data, None, messages)
+    return list(dict.fromkeys(messages))
+
+
+class PatternSet:
+    def __init__(self, groups, time_budget=None):
+        self.names = [group['name'] for group in groups]
+        self.time_budget = DEFAULT_TIME_BUDGET if time_budget is None else time_budget
+        self.sources = []
+        self.compiled = []
+        self.timed = []
+        self.requirements = []
+        self.expression_group = []
+        self.warnings = []
+        for group_index, group in enumerate(groups):
+            for expression in group['expressions']:
+                compiled = compile_guarded(expression)
+                self.sources.append(expression)
+                self.compiled.append(compiled)
+                self.timed.append(self._compile_timed(compiled.pattern))
+                self.requirements.append(required_atoms(expression))
+                self.expression_group.append(group_index)
+                for message in lint_expression(expression):
+                    self.warnings.append({'group': group['name'], 'expression': expression, 'message': message})
+
+        self._atoms = sorted({atom for atoms in self.requirements for atom in atoms})
+        self._stats_lock = threading.Lock()
+        self._calls = [0] * len(self.sources)
+        self._seconds = [0.0] * len(self.sources)
+        self._max_seconds = [0.0] * len(self.sources)
+        self._timeouts = [0] * len(self.sources)
+
+    # Com o módulo regex instalado e um orçamento de tempo, as buscas podem ser interrompidas
+    # no meio; sem ele, o orçamento só é verificado entre uma expressão e outra
+    def _compile_timed(self, pattern):
+        if regex is None or not self.time_budget:
+            return None
+        try:
+            return regex.compile(pattern)
+        except regex.error:
+            return None
+
+    @classmethod
+    def from_file(cls, pattern_file_path):
+        return cls(load_pattern_groups(pattern_file_path))
+
+    def _record(self, index, seconds, timed_out=False):
+        with self._stats_lock:
+            self._calls[index] += 1
+            self._seconds[index] += seconds
+            if seconds > self._max_seconds[index]:
+                self._max_seconds[index] = seconds
+            if timed_out:
+                self._timeouts[index] += 1
+
+    def _deadline(self):
+        return time.perf_counter() + self.time_budget if self.time_budget else None
+
+    # Executa search ou finditer de uma expressão dentro do orçamento do texto. Uma expressão que
+    # estoura o orçamento (ou que nem chega a rodar porque ele acabou) levanta _Timeout.
+    def _run(self, index, text, deadline, method):
+        start = time.perf_counter()
+        if deadline is not None and start >= deadline:
+            self._record(index, 0.0, timed_out=True)
+            raise _Timeout()
+        try:
+            if deadline is not None and self.timed[index] is not None:
+                result = getattr(self.timed[index], method)(text, timeout=deadline - start)
+                if method == 'finditer':
+                    result = list(result)
+            else:
+                result = getattr(self.compiled[index], method)(text)
+                if method == 'finditer':
+                    result = list(result)
+        except TimeoutError:
+            self._record(index, time.perf_counter() - start, timed_out=True)
+            raise _Timeout()
+        self._record(index, time.perf_counter() - start)
+        return result
+
+    # Índices das expressões que podem casar com o texto, na ordem do arquivo. Valores que não são
+    # texto (ex.: NaN de uma célula vazia) não casam com nada.
+    def candidates(self, text):
+        if not isinstance(text, str):
+            return []
+        present = set()
+        for atom in self._atoms:
+            if atom == DIGIT:
+                if _DIGIT_RE.search(text):
+                    present.add(atom)
+            elif atom in text:
+                present.add(atom)
+        return [index for index, atoms in enumerate(self.requirements) if atoms <= present]
+
+    # Nome do primeiro grupo (na ordem do arquivo) com alguma expressão presente no texto, ou None,
+    # como langkit.regexes.has_patterns. Se o orçamento acabar antes de uma ocorrência, TIMED_OUT:
+    # uma expressão anterior que não terminou poderia ter casado.
+    def first_match(self, text):
+        deadline = self._deadline()
+        try:
+            for index in self.candidates(text):
+                if self._run(index, text, deadline, 'search'):
+                    return self.names[self.expression_group[index]]
+        except _Timeout:
+            return TIMED_OUT
+        return None
+
+    # Todas as ocorrências de todos os grupos, na ordem do arquivo e depois por posição.
+    # Expressões que estouram o orçamento ficam de fora (contadas em stats()).
+    def find_all(self, text):
+        deadline = self._deadline()
+        matches = []
+        for index in self.candidates(text):
+            name = self.names[self.expression_group[index]]
+            try:
+                found = self._run(index, text, deadline, 'finditer')
+            except _Timeout:
+                continue
+            for match in found:
+                matches.append({'name': name, 'start': match.start(), 'end': match.end(), 'text': match.group(0)})
+        matches.sort(key=lambda item: (self.names.index(item['name']), item['start'], item['end']))
+        return matches
+
+    # Tempo gasto por expressão desde a compilação, mais os avisos do linter
+    def stats(self):
+        with self._stats_lock:
+            expressions = []
+            for index, expression in enumerate(self.sources):
+                calls = self._calls[index]
+                expressions.append({
+                    'group': self.names[self.expression_group[index]],
+                    'expression': expression,
+                    'calls': calls,
+                    'total_seconds': self._seconds[index],
+                    'mean_seconds': self._seconds[index] / calls if calls else 0.0,
+                    'max_seconds': self._max_seconds[index],
+                    'timeouts': self._timeouts[index]
+                })
+        return {
+            'time_budget': self.time_budget,
+            'hard_timeouts': any(timed is not None for timed in self.timed),
+            'expressions': expressions,
+            'warnings': list(self.warnings)
+        }
+
+
+# Intervalo mínimo (em segundos) entre verificações do arquivo de padrões no disco
+RELOAD_CHECK_INTERVAL = float(os.environ.get('TEXT_ANALYSIS_PATTERNS_CHECK_INTERVAL', 1.0))
+
+# Quantos conjuntos compilados (por hash do conteúdo) ficam guardados
+COMPILED_CACHE_SIZE = 8
+
+_compiled = OrderedDict()
+_compiled_lock = threading.Lock()
+
+
+# Compila o conteúdo de um arquivo de padrões uma única vez por hash
+def compile_patterns(content):
+    digest = hashlib.sha256(content).hexdigest()
+    with _compiled_lock:
+        pattern_set = _compiled.get(digest)
+        if pattern_set is not None:
+            _compiled.move_to_end(digest)
+            return digest, pattern_set
+
+    pattern_set = PatternSet(json.loads(content))
+    for warning in pattern_set.warnings:
+        print(f"Pattern warning ({warning['group']}): {warning['message']}: {warning['expression']}")
+    with _compiled_lock:
+        _compiled[digest] = pattern_set
+        while len(_compiled) > COMPILED_CACHE_SIZE:
+            _compiled.popitem(last=False)
+    return digest, pattern_set
+
+
+# Arquivo de padrões observado: current() devolve (hash, PatternSet) da versão em uso e, no máximo
+# uma vez por RELOAD_CHECK_INTERVAL, confere o mtime/tamanho do arquivo. Se o arquivo mudou, o novo
+# conteúdo é compilado e trocado de forma atômica; um arquivo inválido é ignorado e a versão
+# anterior continua em uso.
+class PatternFile:
+    def __init__(self, path, check_interval=RELOAD_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._signature = self._stat_signature()
+        self._load()
+        self._checked_at = time.monotonic()
+
+    def _stat_signature(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self):
+        with open(self.path, 'rb') as f:
+            content = f.read()
+        self._current = compile_patterns(content)
+
+    def current(self):
+        if time.monotonic() - self._checked_at >= self.check_interval and self._lock.acquire(blocking=False):
+            try:
+                self._checked_at = time.monotonic()
+                signature = self._stat_signature()
+                if signature != self._signature:
+                    # A assinatura é registrada antes da carga, para que um arquivo inválido não seja
+                    # relido a cada verificação
+                    self._signature = signature
+                    previous = self._current[0]
+                    self._load()
+                    if self._current[0] != previous:
+                        print(f"Patterns reloaded from {self.path} ({self._current[0][:12]}).")
+            except (OSError, ValueError, KeyError, TypeError, re.error) as e:
+                print(f"Could not reload patterns from {self.path}, keeping the previous version: {str(e)}")
+            finally:
+                self._lock.release()
+        return self._current
+
+
+_files = {}
+_files_lock = threading.Lock()
+
+
+# Instância compartilhada por caminho, para que todos os analisadores do processo vejam a mesma versão
+def get_pattern_file(path):
+    key = os.path.abspath(path)
+    with _files_lock:
+        pattern_file = _files.get(key)
+        if pattern_file is None:
+            pattern_file = PatternFile(path)
+            _files[key] = pattern_file
+        return pattern_file
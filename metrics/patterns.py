@@ -1,11 +1,55 @@
-from langkit import regexes
+import threading
+
+from metrics.base import BatchAnalyzer
+from metrics.pattern_engine import TIMED_OUT, get_pattern_file
 
 # Defina a classe RegexAnalyzer
-class RegexAnalyzer:
+class RegexAnalyzer(BatchAnalyzer):
+    name = 'patterns'
+    default_batch_size = 256
+
     def __init__(self, pattern_file_path="pattern_groups.json"):
-        regexes.init(pattern_file_path=pattern_file_path)
+        # O arquivo é compilado uma vez e recarregado automaticamente quando muda no disco
+        self.pattern_file = get_pattern_file(pattern_file_path)
+        self._local = threading.local()
+
+    # (hash, PatternSet) em uso: fixo durante um lote, para que a chave do cache e os resultados
+    # correspondam à mesma versão dos padrões mesmo se o arquivo mudar no meio
+    def _patterns(self):
+        return getattr(self._local, 'patterns', None) or self.pattern_file.current()
+
+    @property
+    def patterns_hash(self):
+        return self._patterns()[0]
+
+    def cache_config(self):
+        patterns_hash, patterns = self._patterns()
+        return f"{patterns_hash}:budget={patterns.time_budget}"
+
+    # Textos que estouraram o orçamento de tempo são recalculados na próxima vez
+    def cacheable(self, value):
+        return value != TIMED_OUT
+
+    def analyze_batch(self, texts, batch_size=None, **kwargs):
+        self._local.patterns = self.pattern_file.current()
+        try:
+            return super().analyze_batch(texts, batch_size=batch_size, **kwargs)
+        finally:
+            self._local.patterns = None
+
+    def _analyze_chunk(self, texts):
+        patterns = self._patterns()[1]
+        return [patterns.first_match(text) for text in texts]
+
+    # Todas as ocorrências de cada grupo no texto, com as posições
+    def find_all(self, text):
+        return self._patterns()[1].find_all(text)
+
+    def pattern_stats(self):
+        patterns_hash, patterns = self.pattern_file.current()
+        return dict(patterns.stats(), path=self.pattern_file.path, hash=patterns_hash)
 
-    def analyze(self, data):
-        data['prompt_patterns'] = data['prompt'].apply(lambda x: regexes.has_patterns(x))
-        data['response_patterns'] = data['response'].apply(lambda x: regexes.has_patterns(x))
+    def analyze(self, data, batch_size=None):
+        data['prompt_patterns'] = self.analyze_batch(data['prompt'], batch_size=batch_size)
+        data['response_patterns'] = self.analyze_batch(data['response'], batch_size=batch_size)
         return data
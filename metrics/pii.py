@@ -1,19 +1,174 @@
-from presidio_analyzer import AnalyzerEngine
+import os
+import threading
+
+from presidio_analyzer import AnalyzerEngine, BatchAnalyzerEngine, RecognizerRegistry
+from presidio_analyzer.nlp_engine import NlpEngineProvider, SpacyNlpEngine
+from presidio_analyzer.predefined_recognizers import SpacyRecognizer
+
+from metrics.base import BatchAnalyzer
+
+# Processos usados pelo spaCy (nlp.pipe) em cada lote; 1 mantém tudo no processo atual
+DEFAULT_NLP_PROCESSES = int(os.environ.get('TEXT_ANALYSIS_PII_PROCESSES', 1))
+
+# Modelo do spaCy usado pelo presidio: 'large' (padrão do presidio), 'small', 'none' (modelo
+# pequeno sem NER: só reconhecedores por padrão, sem PERSON/LOCATION/NRP) ou o nome/caminho
+# de qualquer outro modelo do spaCy
+NLP_MODELS = {
+    'large': 'en_core_web_lg',
+    'small': 'en_core_web_sm',
+    'none': 'en_core_web_sm'
+}
+DEFAULT_NLP_MODEL = os.environ.get('TEXT_ANALYSIS_PII_MODEL', 'large')
+
+# Componentes do spaCy que o presidio só usa para o NER. Os reconhecedores por padrão dependem
+# apenas dos tokens e dos lemas (realce por palavras de contexto), que vêm do tagger/lemmatizer.
+NER_PIPES = ('ner', 'parser')
+
+
+# Cria o motor de NLP com a configuração padrão do presidio (mapeamento e rótulos ignorados do
+# NER), trocando apenas o modelo
+def create_nlp_engine(model=DEFAULT_NLP_MODEL):
+    provider = NlpEngineProvider()
+    provider.nlp_configuration['models'] = [{'lang_code': 'en', 'model_name': NLP_MODELS.get(model, model)}]
+    nlp_engine = provider.create_engine()
+
+    if model == 'none':
+        for nlp in nlp_engine.nlp.values():
+            for pipe in NER_PIPES:
+                if pipe in nlp.pipe_names:
+                    nlp.remove_pipe(pipe)
+    return nlp_engine
+
+
+# Motor spaCy que reaproveita o modelo já carregado de outro SpacyNlpEngine, mas roda o pipeline
+# sem os componentes de NER_PIPES. Usado quando nenhuma entidade selecionada vem do NER.
+class NerFreeSpacyNlpEngine(SpacyNlpEngine):
+    def __init__(self, nlp_engine):
+        super().__init__(models=nlp_engine.models, ner_model_configuration=nlp_engine.ner_model_configuration)
+        self.nlp = nlp_engine.nlp
+        self.disabled = {
+            language: [pipe for pipe in nlp.pipe_names if pipe in NER_PIPES]
+            for language, nlp in self.nlp.items()
+        }
+
+    def process_text(self, text, language):
+        doc = self.nlp[language](text, disable=self.disabled[language])
+        return self._doc_to_nlp_artifact(doc, language)
+
+    def process_batch(self, texts, language, batch_size=1, n_process=1, as_tuples=False):
+        if as_tuples:
+            texts = ((str(text), context) for text, context in texts)
+        else:
+            texts = (str(text) for text in texts)
+
+        batch_output = self.nlp[language].pipe(
+            texts,
+            as_tuples=as_tuples,
+            batch_size=batch_size,
+            n_process=n_process,
+            disable=self.disabled[language]
+        )
+        for output in batch_output:
+            if as_tuples:
+                doc, context = output
+                yield doc.text, self._doc_to_nlp_artifact(doc, language), context
+            else:
+                yield output.text, self._doc_to_nlp_artifact(output, language)
 
-# Inicialize o motor de análise
-analyzer = AnalyzerEngine()
 
 # Definição da classe PIIAnalyzer
-class PIIAnalyzer:
-    def __init__(self):
-        self.analyzer = AnalyzerEngine()
+class PIIAnalyzer(BatchAnalyzer):
+    name = 'entity'
+    default_batch_size = 64
 
-    def analyze_pii(self, text, entities=None):
-        # Se nenhuma entidade for especificada ou a lista de entidades estiver vazia, analisar todas as entidades
+    def __init__(self, n_process=DEFAULT_NLP_PROCESSES, nlp_model=DEFAULT_NLP_MODEL):
+        self.nlp_model = nlp_model
+        self.analyzer = AnalyzerEngine(nlp_engine=create_nlp_engine(nlp_model))
+        if not self._ner_entities():
+            # Sem NER no modelo, o reconhecedor do spaCy nunca encontra nada
+            self.analyzer.registry.remove_recognizer('SpacyRecognizer')
+        # O BatchAnalyzerEngine roda o spaCy uma vez por lote (nlp.pipe) e depois os reconhecedores
+        # de cada texto sobre os artefatos já calculados
+        self.batch_analyzer = BatchAnalyzerEngine(analyzer_engine=self.analyzer)
+        self.n_process = n_process
+        # Motores podados por seleção de entidades (frozenset), criados sob demanda
+        self._engines = {}
+        self._engines_lock = threading.Lock()
+
+    # 'none' usa o mesmo pacote do 'small', mas sem NER, então recebe um namespace próprio
+    def cache_config(self):
+        model = NLP_MODELS.get(self.nlp_model, self.nlp_model)
+        return f"{model}-no-ner" if self.nlp_model == 'none' else model
+
+    # Entidades que o modelo de NER carregado consegue produzir, já com o mapeamento do presidio.
+    # Para motores que não são spaCy, todas as entidades dos reconhecedores de NLP.
+    def _ner_entities(self):
+        nlp_engine = self.analyzer.nlp_engine
+        nlp_entities = {
+            entity
+            for recognizer in self.analyzer.registry.recognizers
+            if isinstance(recognizer, SpacyRecognizer)
+            for entity in recognizer.supported_entities
+        }
+        if type(nlp_engine) is not SpacyNlpEngine:
+            return nlp_entities
+
+        config = nlp_engine.ner_model_configuration
+        mapping = config.model_to_presidio_entity_mapping
+        entities = set()
+        for nlp in nlp_engine.nlp.values():
+            if 'ner' not in nlp.pipe_names:
+                continue
+            for label in nlp.get_pipe('ner').labels:
+                if label in config.labels_to_ignore:
+                    continue
+                entity = mapping.get(label, label)
+                if entity not in config.labels_to_ignore:
+                    entities.add(entity)
+        return entities
+
+    # Monta um AnalyzerEngine só com os reconhecedores das entidades selecionadas. Se nenhuma
+    # delas vem do NER, o reconhecedor do spaCy sai do registro e o pipeline roda sem o NER.
+    def _build_engine(self, entities):
+        ner_entities = self._ner_entities()
+        needs_ner = bool(entities & ner_entities)
+        recognizers = [
+            recognizer for recognizer in self.analyzer.registry.recognizers
+            if entities.intersection(recognizer.supported_entities)
+            and (needs_ner or not isinstance(recognizer, SpacyRecognizer))
+        ]
+        if not recognizers:
+            return self.analyzer
+
+        nlp_engine = self.analyzer.nlp_engine
+        if not needs_ner and type(nlp_engine) is SpacyNlpEngine:
+            nlp_engine = NerFreeSpacyNlpEngine(nlp_engine)
+
+        registry = RecognizerRegistry(
+            recognizers=recognizers,
+            global_regex_flags=self.analyzer.registry.global_regex_flags,
+            supported_languages=self.analyzer.supported_languages
+        )
+        print(f"PII engine for {sorted(entities)}: {len(recognizers)} recognizers, NER {'on' if needs_ner else 'off'}.")
+        return AnalyzerEngine(
+            registry=registry,
+            nlp_engine=nlp_engine,
+            supported_languages=self.analyzer.supported_languages,
+            context_aware_enhancer=self.analyzer.context_aware_enhancer
+        )
+
+    def _engine(self, entities):
         if not entities:
-            entities = None
-        
-        results = self.analyzer.analyze(text=text, entities=entities, language='en')
+            return self.analyzer
+
+        key = frozenset(entities)
+        with self._engines_lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                engine = self._engines[key] = self._build_engine(key)
+            return engine
+
+    def _entities_info(self, text, results):
         entities_info = []
 
         for result in results:
@@ -23,10 +178,36 @@ class PIIAnalyzer:
                 "Confiança": result.score
             }
             entities_info.append(entity_info)
-        
+
         return entities_info
 
-    def analyze(self, data, selected_entities=None):
-        data['prompt_pii'] = data['prompt'].apply(lambda x: self.analyze_pii(x, entities=selected_entities))
-        data['response_pii'] = data['response'].apply(lambda x: self.analyze_pii(x, entities=selected_entities))
+    def analyze_pii(self, text, entities=None):
+        # Se nenhuma entidade for especificada ou a lista de entidades estiver vazia, analisar todas as entidades
+        if not entities:
+            entities = None
+        
+        results = self._engine(entities).analyze(text=text, entities=entities, language='en')
+        return self._entities_info(text, results)
+
+    def _analyze_chunk(self, texts, entities=None):
+        if not entities:
+            entities = None
+
+        engine = self._engine(entities)
+        batch_analyzer = self.batch_analyzer if engine is self.analyzer else BatchAnalyzerEngine(analyzer_engine=engine)
+        results = batch_analyzer.analyze_iterator(
+            texts,
+            language='en',
+            batch_size=len(texts),
+            n_process=self.n_process,
+            entities=entities
+        )
+        return [self._entities_info(str(text), text_results) for text, text_results in zip(texts, results)]
+
+    def analyze(self, data, selected_entities=None, batch_size=None):
+        # Prompts e respostas passam pelo spaCy como um único fluxo de textos, em lotes
+        texts = list(data['prompt']) + list(data['response'])
+        results = self.analyze_batch(texts, batch_size=batch_size, entities=selected_entities)
+        data['prompt_pii'] = results[:len(data)]
+        data['response_pii'] = results[len(data):]
         return data
@@ -1,13 +1,38 @@
-from langkit import themes 
-from langkit import injections 
+import numpy as np
+from langkit import injections
+
+from metrics.base import BatchAnalyzer
+from metrics.similarity import DEFAULT_MODEL_NAME, group_similarity_batch, reference_signature
 
 # Defina a classe PromptAnalyzer
-class PromptAnalyzer:
+class PromptAnalyzer(BatchAnalyzer):
+    name = 'prompt'
+    # v2: injection gravado como float simples, e não mais como a saída do langkit por texto
+    cache_version = 2
+
     def __init__(self):
         pass
 
-    def analyze(self, data):
+    def cache_config(self):
+        return f"{DEFAULT_MODEL_NAME}:{reference_signature('jailbreak')}"
+
+    def _analyze_chunk(self, texts):
+        # Cada bloco gera um par (injection, jailbreak) por texto
+        texts = [text if isinstance(text, str) else '' for text in texts]
+        # Uma única chamada ao langkit para o bloco inteiro; a saída (lista, array ou um
+        # valor por texto embrulhado em lista) é achatada em um float por texto.
+        # O injection não passa pelo reference_index: o langkit compara o prompt com embeddings de
+        # frases nocivas que ele baixa já codificados, em um índice FAISS próprio, sem as frases em
+        # texto que o reference_index codifica com o nosso modelo.
+        injection_scores = np.asarray(injections.injection({'prompt': texts}), dtype=float).reshape(-1).tolist()
+        if len(injection_scores) != len(texts):
+            raise ValueError(f"Expected {len(texts)} injection scores, got {len(injection_scores)}")
+        jailbreak_scores = group_similarity_batch(texts, 'jailbreak', batch_size=len(texts))
+        return list(zip(injection_scores, jailbreak_scores))
+
+    def analyze(self, data, batch_size=None):
         # Cria colunas para armazenar os resultados das análises
-        data['prompt_injection'] = data['prompt'].apply(lambda x: injections.injection({'prompt': [x]}))
-        data['prompt_jailbreak'] = data['prompt'].apply(lambda x: themes.group_similarity(x, 'jailbreak'))
+        scores = self.analyze_batch(data['prompt'], batch_size=batch_size)
+        data['prompt_injection'] = np.array([injection for injection, _ in scores], dtype=float)
+        data['prompt_jailbreak'] = np.array([jailbreak for _, jailbreak in scores], dtype=float)
         return data
@@ -0,0 +1,137 @@
+import hashlib
+import math
+import os
+
+import numpy as np
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+# Índices de busca pela maior similaridade entre textos e um conjunto de frases de referência
+# (refusal, jailbreak). Os embeddings são normalizados, então a similaridade de cosseno é o produto
+# escalar. Conjuntos pequenos, como os do langkit, usam a busca exata (um produto de matrizes).
+# Os índices aproximados só fazem diferença para conjuntos grandes de frases próprias
+# (TEXT_ANALYSIS_REFERENCE_PHRASES):
+#   - 'faiss': HNSW do FAISS (CPU). Com 'auto', é usado a partir de TEXT_ANALYSIS_ANN_MIN_SIZE
+#     frases quando o pacote faiss está instalado; sem ele, 'auto' continua na busca exata;
+#   - 'ivf': IVF-flat em NumPy, só quando escolhido explicitamente. As frases são agrupadas por
+#     k-means esférico em ~2·√N grupos e cada texto é comparado com as frases dos
+#     TEXT_ANALYSIS_ANN_NPROBE grupos de centroide mais próximo, então o custo por texto cresce
+#     com √N. Mais grupos visitados dão mais recall e mais latência; o recall depende de quão
+#     agrupados são os embeddings: meça com benchmarks/ann_recall.py antes de adotá-lo.
+
+# 'auto' (faiss se instalado e o conjunto for grande, senão exata), 'exact', 'ivf' ou 'faiss'
+ANN_BACKEND = os.environ.get('TEXT_ANALYSIS_ANN_BACKEND', 'auto')
+ANN_MIN_SIZE = int(os.environ.get('TEXT_ANALYSIS_ANN_MIN_SIZE', 2048))
+# Grupos visitados pelo IVF em cada busca
+ANN_NPROBE = int(os.environ.get('TEXT_ANALYSIS_ANN_NPROBE', 8))
+
+KMEANS_ITERATIONS = 20
+# O k-means é treinado com uma amostra de até tantas frases por grupo
+KMEANS_SAMPLE_PER_LIST = 32
+HNSW_NEIGHBORS = 32
+HNSW_EF_SEARCH = 64
+
+
+class ExactIndex:
+    kind = 'exact'
+
+    def __init__(self, vectors):
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+    def max_similarity(self, queries):
+        return np.max(np.asarray(queries, dtype=np.float32) @ self.vectors.T, axis=1)
+
+
+class IVFIndex:
+    kind = 'ivf'
+
+    def __init__(self, vectors, n_lists=None, nprobe=None, seed=0):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        # Conjuntos muito pequenos não têm frases para tantos grupos
+        n_lists = max(1, min(n_lists or int(round(2 * math.sqrt(len(vectors)))), len(vectors)))
+        self.nprobe = min(nprobe or ANN_NPROBE, n_lists)
+        self.centroids = self._kmeans(vectors, n_lists, seed)
+
+        assignments = np.argmax(vectors @ self.centroids.T, axis=1)
+        self.lists = [vectors[assignments == index] for index in range(len(self.centroids))]
+
+    @staticmethod
+    def _kmeans(vectors, n_lists, seed):
+        rng = np.random.default_rng(seed)
+        sample_size = n_lists * KMEANS_SAMPLE_PER_LIST
+        if len(vectors) > sample_size:
+            vectors = vectors[rng.choice(len(vectors), size=sample_size, replace=False)]
+        centroids = vectors[rng.choice(len(vectors), size=n_lists, replace=False)]
+        for _ in range(KMEANS_ITERATIONS):
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, vectors)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Grupos que ficaram vazios mantêm o centroide anterior
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+        return centroids.astype(np.float32)
+
+    def max_similarity(self, queries):
+        queries = np.asarray(queries, dtype=np.float32)
+        best = np.full(len(queries), -np.inf, dtype=np.float32)
+        if len(queries) == 0:
+            return best
+
+        centroid_scores = queries @ self.centroids.T
+        probes = np.argpartition(-centroid_scores, self.nprobe - 1, axis=1)[:, :self.nprobe]
+
+        # Um produto de matrizes por grupo, com todos os textos que o visitam
+        for index, vectors in enumerate(self.lists):
+            if len(vectors) == 0:
+                continue
+            rows = np.nonzero((probes == index).any(axis=1))[0]
+            if len(rows):
+                best[rows] = np.maximum(best[rows], np.max(queries[rows] @ vectors.T, axis=1))
+        return best
+
+
+class FaissIndex:
+    kind = 'faiss'
+
+    def __init__(self, vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.index = faiss.IndexHNSWFlat(vectors.shape[1], HNSW_NEIGHBORS, faiss.METRIC_INNER_PRODUCT)
+        self.index.hnsw.efSearch = HNSW_EF_SEARCH
+        self.index.add(vectors)
+
+    def max_similarity(self, queries):
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        if len(queries) == 0:
+            return np.zeros(0, dtype=np.float32)
+        scores, _ = self.index.search(queries, 1)
+        return scores[:, 0]
+
+
+def resolve_backend(n_vectors, backend=ANN_BACKEND):
+    if backend == 'auto':
+        return 'faiss' if faiss is not None and n_vectors >= ANN_MIN_SIZE else 'exact'
+    if backend == 'faiss' and faiss is None:
+        return 'ivf'
+    return backend
+
+
+def build_index(vectors, backend=ANN_BACKEND):
+    if backend == 'faiss' and faiss is None:
+        print("faiss is not installed; using the NumPy IVF index.")
+    backend = resolve_backend(len(vectors), backend)
+    if backend == 'faiss':
+        return FaissIndex(vectors)
+    if backend == 'ivf':
+        return IVFIndex(vectors)
+    return ExactIndex(vectors)
+
+
+# Identifica as frases e o tipo de índice, para o namespace do cache de resultados
+def index_signature(phrases, backend):
+    digest = hashlib.sha256('\0'.join(phrases).encode('utf-8')).hexdigest()[:16]
+    if backend == 'ivf':
+        return f"{backend}{ANN_NPROBE}:{digest}"
+    return f"{backend}:{digest}"
@@ -1,11 +1,19 @@
-from langkit import themes 
+from metrics.base import BatchAnalyzer
+from metrics.similarity import DEFAULT_MODEL_NAME, group_similarity_batch, reference_signature
 
 # Defina a classe RefusalAnalyzer
-class RefusalAnalyzer:
+class RefusalAnalyzer(BatchAnalyzer):
+    name = 'refusal'
+
     def __init__(self):
         pass
 
-    def analyze(self, data):
-        data['refusal'] = data['response'].apply(lambda x: themes.group_similarity(x, 'refusal'))
-        return data
+    def cache_config(self):
+        return f"{DEFAULT_MODEL_NAME}:{reference_signature('refusal')}"
 
+    def _analyze_chunk(self, texts):
+        return group_similarity_batch(texts, 'refusal', batch_size=len(texts))
+
+    def analyze(self, data, batch_size=None):
+        data['refusal'] = self.analyze_batch(data['response'], batch_size=batch_size)
+        return data
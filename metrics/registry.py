@@ -0,0 +1,96 @@
+import importlib
+import os
+import resource
+import threading
+import time
+
+# Analisadores disponíveis, indexados pelo mesmo nome usado nas abas do app
+ANALYZERS = {
+    'toxicity': ('metrics.toxicity', 'ToxicityAnalyzer'),
+    'sentiment': ('metrics.sentiment', 'SentimentAnalyzer'),
+    'prompt': ('metrics.prompt_analyses', 'PromptAnalyzer'),
+    'refusal': ('metrics.refusal', 'RefusalAnalyzer'),
+    'topics': ('metrics.topics', 'TopicsAnalyzer'),
+    'patterns': ('metrics.patterns', 'RegexAnalyzer'),
+    'entity': ('metrics.pii', 'PIIAnalyzer'),
+    'textstat': ('metrics.textstat', 'TextStatAnalyzer'),
+}
+
+_instances = {}
+_stats = {}
+_lock = threading.Lock()
+_key_locks = {}
+
+
+# Memória residente atual do processo, em bytes
+def rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # Sem /proc (ex.: macOS), usa o pico de memória como aproximação
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if os.uname().sysname == 'Darwin' else usage * 1024
+
+
+def _make_key(name, kwargs):
+    return (name, tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+
+
+def _key_lock(key):
+    with _lock:
+        if key not in _key_locks:
+            _key_locks[key] = threading.Lock()
+        return _key_locks[key]
+
+
+# Retorna a instância compartilhada do analisador, criando-a apenas na primeira chamada
+# deste processo. A importação do módulo também acontece aqui, para que o custo de carga
+# dos modelos entre nas estatísticas de carga e não na latência por linha.
+def get_analyzer(name, **kwargs):
+    if name not in ANALYZERS:
+        raise ValueError(f"Unknown analyzer: {name}")
+
+    key = _make_key(name, kwargs)
+    instance = _instances.get(key)
+    if instance is not None:
+        return instance
+
+    with _key_lock(key):
+        instance = _instances.get(key)
+        if instance is not None:
+            return instance
+
+        module_name, class_name = ANALYZERS[name]
+        rss_before = rss_bytes()
+        start_time = time.perf_counter()
+
+        module = importlib.import_module(module_name)
+        instance = getattr(module, class_name)(**kwargs)
+
+        load_seconds = time.perf_counter() - start_time
+        rss_after = rss_bytes()
+
+        with _lock:
+            _instances[key] = instance
+            _stats[key] = {
+                'name': name,
+                'config': dict(kwargs),
+                'load_seconds': load_seconds,
+                'rss_delta_bytes': max(rss_after - rss_before, 0),
+                'rss_bytes': rss_after,
+                'loaded_at': time.time(),
+                'pid': os.getpid()
+            }
+        print(f"Analyzer '{name}' loaded in {load_seconds:.2f} seconds (+{max(rss_after - rss_before, 0) / 2**20:.1f} MiB).")
+        return instance
+
+
+def is_loaded(name, **kwargs):
+    return _make_key(name, kwargs) in _instances
+
+
+# Estatísticas de carga de todos os analisadores já criados neste processo
+def loaded_stats():
+    with _lock:
+        return [dict(stats) for stats in _stats.values()]
@@ -1,13 +1,20 @@
 from langkit import sentiment
 
+from metrics.base import BatchAnalyzer
+
 # Defina a classe SentimentAnalyzer
-class SentimentAnalyzer:
+class SentimentAnalyzer(BatchAnalyzer):
+    name = 'sentiment'
+
     def __init__(self):
         pass
 
-    def analyze(self, data):
+    def _analyze_chunk(self, texts):
+        # O VADER do NLTK não tem inferência em lote; os textos do bloco são avaliados em sequência
+        return [sentiment.sentiment_nltk(text) for text in texts]
+
+    def analyze(self, data, batch_size=None):
         # Aplica a análise de sentimento nas colunas 'prompt' e 'response'
-        data['prompt_sentiment'] = data['prompt'].apply(sentiment.sentiment_nltk)
-        data['response_sentiment'] = data['response'].apply(sentiment.sentiment_nltk)
+        data['prompt_sentiment'] = self.analyze_batch(data['prompt'], batch_size=batch_size)
+        data['response_sentiment'] = self.analyze_batch(data['response'], batch_size=batch_size)
         return data
-
@@ -0,0 +1,89 @@
+import functools
+import json
+import os
+import threading
+
+import langkit
+from sentence_transformers import SentenceTransformer
+
+from metrics.embeddings import get_store
+from metrics.reference_index import build_index, index_signature, resolve_backend
+
+# Mesmo modelo de embeddings usado pelo langkit.themes
+DEFAULT_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Arquivo JSON opcional com frases de referência próprias por grupo ({"refusal": [...], ...}),
+# somadas às do langkit
+REFERENCE_PHRASES_PATH = os.environ.get('TEXT_ANALYSIS_REFERENCE_PHRASES')
+
+_models = {}
+_reference_indexes = {}
+_lock = threading.Lock()
+
+
+def get_model(model_name=DEFAULT_MODEL_NAME):
+    with _lock:
+        if model_name not in _models:
+            _models[model_name] = SentenceTransformer(model_name)
+        return _models[model_name]
+
+
+# Codifica os textos em lotes; os embeddings saem normalizados, então o produto escalar é a similaridade de cosseno.
+# Com o armazém de embeddings ativo, cada texto é codificado uma única vez por modelo e os
+# analisadores de similaridade (refusal, prompt, topics) reaproveitam os vetores uns dos outros.
+def encode(texts, batch_size=32, model_name=DEFAULT_MODEL_NAME):
+    texts = [text if isinstance(text, str) else '' for text in texts]
+
+    def encode_with_model(pending):
+        model = get_model(model_name)
+        return model.encode(pending, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)
+
+    store = get_store(model_name)
+    if store is None:
+        return encode_with_model(texts)
+    return store.get_or_encode(texts, encode_with_model)
+
+
+# Frases de referência de um grupo (ex.: 'refusal', 'jailbreak') do themes.json distribuído com o langkit
+def theme_phrases(group):
+    themes_path = os.path.join(os.path.dirname(langkit.__file__), 'themes.json')
+    with open(themes_path, encoding='utf-8') as f:
+        themes = json.load(f)
+    return themes[group]
+
+
+# Lidas uma vez por processo, como o índice montado com elas
+@functools.lru_cache(maxsize=None)
+def reference_phrases(group):
+    phrases = list(theme_phrases(group))
+    if REFERENCE_PHRASES_PATH:
+        with open(REFERENCE_PHRASES_PATH, encoding='utf-8') as f:
+            phrases.extend(json.load(f).get(group, []))
+    return tuple(dict.fromkeys(phrases))
+
+
+# Índice de busca das frases do grupo, montado uma vez por processo
+def reference_index(group, model_name=DEFAULT_MODEL_NAME):
+    key = (group, model_name)
+    if key not in _reference_indexes:
+        phrases = reference_phrases(group)
+        index = build_index(encode(phrases, model_name=model_name))
+        print(f"Reference index '{group}': {len(phrases)} phrases, {index.kind} search.")
+        with _lock:
+            _reference_indexes[key] = (index, index_signature(phrases, index.kind))
+    return _reference_indexes[key]
+
+
+# Frases e tipo de índice do grupo, sem carregar o modelo; entra no namespace do cache
+def reference_signature(group):
+    phrases = reference_phrases(group)
+    return index_signature(phrases, resolve_backend(len(phrases)))
+
+
+# Equivalente em lote de langkit.themes.group_similarity: maior similaridade de cada texto com as frases do grupo
+def group_similarity_batch(texts, group, batch_size=32, model_name=DEFAULT_MODEL_NAME):
+    if len(texts) == 0:
+        return []
+    embeddings = encode(texts, batch_size=batch_size, model_name=model_name)
+    index, _ = reference_index(group, model_name)
+    return index.max_similarity(embeddings).astype(float).tolist()
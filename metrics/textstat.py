@@ -1,11 +1,33 @@
+import numpy as np
 import textstat
 import pandas as pd
 
+from metrics import textstat_engine
+from metrics.base import BatchAnalyzer
+from metrics.textstat_engine import METRIC_NAMES
+
+# Métricas inteiras; as demais são float, exceto Text Standard, que é texto
+INTEGER_METRICS = (
+    "Difficult Words",
+    "Lexicon Count",
+    "Sentence Count",
+    "Syllable Count",
+    "Character Count",
+    "Polysyllable Count",
+    "Monosyllable Count"
+)
+
 # Definição da classe TextStatAnalyzer
-class TextStatAnalyzer:
+class TextStatAnalyzer(BatchAnalyzer):
+    name = 'textstat'
+    default_batch_size = 256
+
     def __init__(self, language='en'):
         self.language = language
 
+    def cache_config(self):
+        return self.language
+
     def analyze_text(self, text):
         # Verifica se o texto está vazio ou None
         if not text:
@@ -28,6 +50,10 @@ class TextStatAnalyzer:
                 "Monosyllable Count": None
             }
 
+        # Com uma versão suportada do textstat, todas as métricas saem de uma única passada pelo texto
+        if textstat_engine.AVAILABLE:
+            return textstat_engine.analyze_text(text)
+
         # Aplica as funções de análise de textstat
         results = {
             "Flesch Reading Ease": textstat.flesch_reading_ease(text),
@@ -49,16 +75,41 @@ class TextStatAnalyzer:
         }
         return results
 
-    def analyze(self, data):
-        # Aplica a função analyze_text para cada texto na coluna 'prompt' e adiciona novas colunas
-        prompt_stats = data['prompt'].apply(lambda x: pd.Series(self.analyze_text(x)))
-        prompt_stats.columns = ["Prompt " + col for col in prompt_stats.columns]
-        
-        # Aplica a função analyze_text para cada texto na coluna 'response' e adiciona novas colunas
-        response_stats = data['response'].apply(lambda x: pd.Series(self.analyze_text(x)))
-        response_stats.columns = ["Response " + col for col in response_stats.columns]
-        
+    def _analyze_chunk(self, texts):
+        return [self.analyze_text(text) for text in texts]
+
+    # Saída colunar: os valores de cada métrica vão direto para um array NumPy pré-alocado,
+    # sem criar um objeto pandas por linha. Textos vazios ficam como NaN (ou None no Text Standard).
+    def analyze_columns(self, texts, batch_size=None, prefix=''):
+        results = self.analyze_batch(texts, batch_size=batch_size)
+        n_rows = len(results)
+        columns = {
+            name: np.full(n_rows, None, dtype=object) if name == "Text Standard" else np.full(n_rows, np.nan)
+            for name in METRIC_NAMES
+        }
+
+        has_missing = False
+        for row_index, row in enumerate(results):
+            if row["Lexicon Count"] is None:
+                has_missing = True
+                continue
+            for name in METRIC_NAMES:
+                columns[name][row_index] = row[name]
+
+        # Sem linhas vazias, as contagens mantêm o tipo inteiro
+        if not has_missing:
+            for name in INTEGER_METRICS:
+                columns[name] = columns[name].astype(np.int64)
+
+        return {prefix + name: values for name, values in columns.items()}
+
+    def analyze(self, data, batch_size=None):
+        # Calcula as métricas de 'prompt' e 'response' e monta o DataFrame de resultado de uma só vez
+        columns = self.analyze_columns(data['prompt'], batch_size=batch_size, prefix="Prompt ")
+        columns.update(self.analyze_columns(data['response'], batch_size=batch_size, prefix="Response "))
+        stats = pd.DataFrame(columns, index=data.index, copy=False)
+
         # Concatena as novas colunas ao DataFrame original
-        analyzed_data = pd.concat([data, prompt_stats, response_stats], axis=1)
-        
+        analyzed_data = pd.concat([data, stats], axis=1)
+
         return analyzed_data
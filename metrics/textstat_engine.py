@@ -0,0 +1,229 @@
+import functools
+import math
+import os
+import re
+from collections import Counter
+from importlib import metadata
+
+import textstat
+
+# Motor de passada única para as 16 métricas do TextStatAnalyzer: o texto é tokenizado uma vez,
+# as contagens compartilhadas (sentenças, palavras, sílabas, polissílabas, palavras difíceis) são
+# calculadas uma vez e todas as métricas são derivadas delas com as mesmas fórmulas e o mesmo
+# arredondamento do textstat. As sílabas de cada palavra continuam vindo do próprio textstat
+# (Pyphen ou cmudict, conforme a versão instalada), com um cache maior que o dele.
+
+# Versões do textstat cujas fórmulas este motor reproduz. A partir da 0.7.6 o textstat foi
+# reescrito (contagem de palavras e arredondamento diferentes); nesses casos o analisador
+# volta a chamar as funções do textstat uma a uma.
+SUPPORTED_VERSIONS = ((0, 7, 3), (0, 7, 6))
+
+
+def _installed_version():
+    try:
+        version = metadata.version('textstat')
+    except metadata.PackageNotFoundError:
+        return None
+    parts = re.findall(r'\d+', version)[:3]
+    return tuple(int(part) for part in parts)
+
+
+TEXTSTAT_VERSION = _installed_version()
+AVAILABLE = TEXTSTAT_VERSION is not None and SUPPORTED_VERSIONS[0] <= TEXTSTAT_VERSION < SUPPORTED_VERSIONS[1]
+
+# Configuração do textstat para o idioma padrão (en_US), o único usado pelo analisador
+FRE_BASE = 206.835
+FRE_SENTENCE_LENGTH = 1.015
+FRE_SYLL_PER_WORD = 84.6
+SYLLABLE_THRESHOLD = 3
+
+PUNCTUATION_RE = re.compile(r"[^\w\s]")
+SPACE_RE = re.compile(r"\s")
+SENTENCE_RE = re.compile(r"\b[^.!?]+[.!?]*", re.UNICODE)
+DIFFICULT_WORD_RE = re.compile(r"[\w\='‘’]+")
+
+METRIC_NAMES = [
+    "Flesch Reading Ease",
+    "SMOG Index",
+    "Flesch-Kincaid Grade Level",
+    "Coleman-Liau Index",
+    "Automated Readability Index",
+    "Dale-Chall Readability Score",
+    "Difficult Words",
+    "Linsear Write Formula",
+    "Gunning Fog Index",
+    "Text Standard",
+    "Lexicon Count",
+    "Sentence Count",
+    "Syllable Count",
+    "Character Count",
+    "Polysyllable Count",
+    "Monosyllable Count"
+]
+
+
+@functools.lru_cache(maxsize=2**16)
+def syllables(word):
+    return textstat.syllable_count(word)
+
+
+@functools.lru_cache(maxsize=None)
+def easy_words():
+    path = os.path.join(os.path.dirname(textstat.__file__), 'resources', 'en', 'easy_words.txt')
+    with open(path, 'rb') as f:
+        return {line.decode('utf-8').strip() for line in f}
+
+
+# Mesmo arredondamento de textstatistics._legacy_round
+def legacy_round(number, points=0):
+    p = 10 ** points
+    return float(math.floor((number * p) + math.copysign(0.5, number))) / p
+
+
+def grade_suffix(grade):
+    ordinal_map = {1: 'st', 2: 'nd', 3: 'rd'}
+    teens_map = {11: 'th', 12: 'th', 13: 'th'}
+    return teens_map.get(grade % 100, ordinal_map.get(grade % 10, 'th'))
+
+
+def lexicon_count(text):
+    return len(PUNCTUATION_RE.sub('', text).split())
+
+
+def sentence_count(text):
+    sentences = SENTENCE_RE.findall(text)
+    ignored = sum(1 for sentence in sentences if lexicon_count(sentence) <= 2)
+    return max(1, len(sentences) - ignored)
+
+
+def _ratio(numerator, denominator, points):
+    if denominator == 0:
+        return 0.0
+    return legacy_round(float(numerator / denominator), points)
+
+
+# Consenso entre os índices, como em textstatistics.text_standard
+def _text_standard(scores):
+    grade = []
+
+    def append_bounds(value):
+        grade.append(int(legacy_round(value)))
+        grade.append(int(math.ceil(value)))
+
+    append_bounds(scores["Flesch-Kincaid Grade Level"])
+
+    score = scores["Flesch Reading Ease"]
+    if score < 100 and score >= 90:
+        grade.append(5)
+    elif score < 90 and score >= 80:
+        grade.append(6)
+    elif score < 80 and score >= 70:
+        grade.append(7)
+    elif score < 70 and score >= 60:
+        grade.append(8)
+        grade.append(9)
+    elif score < 60 and score >= 50:
+        grade.append(10)
+    elif score < 50 and score >= 40:
+        grade.append(11)
+    elif score < 40 and score >= 30:
+        grade.append(12)
+    else:
+        grade.append(13)
+
+    for name in ("SMOG Index", "Coleman-Liau Index", "Automated Readability Index",
+                 "Dale-Chall Readability Score", "Linsear Write Formula", "Gunning Fog Index"):
+        append_bounds(scores[name])
+
+    final_grade = Counter(grade).most_common(1)[0][0]
+    lower_score = int(final_grade) - 1
+    upper_score = lower_score + 1
+    return "{}{} and {}{} grade".format(lower_score, grade_suffix(lower_score), upper_score, grade_suffix(upper_score))
+
+
+# Calcula as 16 métricas de um texto não vazio
+def analyze_text(text):
+    tokens = text.split()
+    token_syllables = [syllables(token) for token in tokens]
+    words = PUNCTUATION_RE.sub('', text).split()
+
+    n_words = len(words)
+    n_sentences = sentence_count(text)
+    n_syllables = sum(token_syllables)
+    n_chars = len(SPACE_RE.sub('', text))
+    n_letters = sum(len(word) for word in words)
+    n_polysyllables = sum(1 for count in token_syllables if count >= 3)
+    n_monosyllables = sum(1 for word in words if syllables(word) < 2)
+
+    # Palavras difíceis: únicas, fora da lista de palavras fáceis, por limite de sílabas
+    easy = easy_words()
+    hard_syllables = [syllables(word) for word in set(DIFFICULT_WORD_RE.findall(text.lower())) if word not in easy]
+    n_not_easy = len(hard_syllables)
+    n_difficult = sum(1 for count in hard_syllables if count >= 2)
+    n_difficult_fog = sum(1 for count in hard_syllables if count >= SYLLABLE_THRESHOLD)
+
+    sentence_length = _ratio(n_words, n_sentences, 1)
+    syllables_per_word = _ratio(n_syllables, n_words, 1)
+
+    scores = {}
+    scores["Flesch Reading Ease"] = legacy_round(
+        FRE_BASE
+        - float(FRE_SENTENCE_LENGTH * sentence_length)
+        - float(FRE_SYLL_PER_WORD * syllables_per_word), 2)
+
+    if n_sentences >= 3:
+        scores["SMOG Index"] = legacy_round((1.043 * (30 * (n_polysyllables / n_sentences)) ** .5) + 3.1291, 1)
+    else:
+        scores["SMOG Index"] = 0.0
+
+    scores["Flesch-Kincaid Grade Level"] = legacy_round(
+        float(0.39 * sentence_length) + float(11.8 * syllables_per_word) - 15.59, 1)
+
+    letters = legacy_round(_ratio(n_letters, n_words, 2) * 100, 2)
+    sentences = legacy_round(_ratio(n_sentences, n_words, 2) * 100, 2)
+    scores["Coleman-Liau Index"] = legacy_round(float((0.058 * letters) - (0.296 * sentences) - 15.8), 2)
+
+    if n_words:
+        a = float(n_chars) / float(n_words)
+        b = float(n_words) / float(n_sentences)
+        scores["Automated Readability Index"] = legacy_round(
+            (4.71 * legacy_round(a, 2)) + (0.5 * legacy_round(b, 2)) - 21.43, 1)
+    else:
+        scores["Automated Readability Index"] = 0.0
+
+    if n_words:
+        per_difficult_words = 100 - float(n_words - n_not_easy) / float(n_words) * 100
+        score = (0.1579 * per_difficult_words) + (0.0496 * sentence_length)
+        if per_difficult_words > 5:
+            score += 3.6365
+        scores["Dale-Chall Readability Score"] = legacy_round(score, 2)
+    else:
+        scores["Dale-Chall Readability Score"] = 0.0
+
+    scores["Difficult Words"] = n_difficult
+
+    # O Linsear Write usa só as 100 primeiras palavras; com até 100 palavras a contagem de
+    # sentenças do texto reduzido é a mesma do texto inteiro
+    first_syllables = token_syllables[:100]
+    easy_count = sum(1 for count in first_syllables if count < 3)
+    difficult_count = len(first_syllables) - easy_count
+    linsear_sentences = n_sentences if len(tokens) <= 100 else sentence_count(' '.join(tokens[:100]))
+    number = float((easy_count * 1 + difficult_count * 3) / linsear_sentences)
+    if number <= 20:
+        number -= 2
+    scores["Linsear Write Formula"] = number / 2
+
+    if n_words:
+        per_diff_words = n_difficult_fog / n_words * 100
+        scores["Gunning Fog Index"] = legacy_round(0.4 * (sentence_length + per_diff_words), 2)
+    else:
+        scores["Gunning Fog Index"] = 0.0
+
+    scores["Text Standard"] = _text_standard(scores)
+    scores["Lexicon Count"] = n_words
+    scores["Sentence Count"] = n_sentences
+    scores["Syllable Count"] = n_syllables
+    scores["Character Count"] = n_chars
+    scores["Polysyllable Count"] = n_polysyllables
+    scores["Monosyllable Count"] = n_monosyllables
+    return {name: scores[name] for name in METRIC_NAMES}
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from metrics.similarity import DEFAULT_MODEL_NAME, encode
+
+# Classificação de tópicos por embeddings: a lista de tópicos candidatos é codificada uma única vez
+# (cache pelo hash da lista), os textos são codificados em lotes e todos os textos de um lote são
+# comparados com todos os tópicos em um único produto de matrizes. Cada texto recebe os top-k
+# tópicos com a similaridade de cosseno de cada um.
+# O modelo padrão é o mesmo das análises de similaridade (all-MiniLM-L6-v2), treinado só em inglês;
+# o langkit usava um modelo zero-shot multilíngue. Para textos em outras línguas, defina
+# TEXT_ANALYSIS_TOPICS_MODEL com um modelo multilíngue (ex.: paraphrase-multilingual-MiniLM-L12-v2).
+
+# Mesma lista padrão do langkit.topics
+DEFAULT_TOPICS = ['law', 'finance', 'medical', 'education', 'politics', 'support']
+
+# Frase usada para codificar cada tópico, no estilo da hipótese da classificação zero-shot
+TOPIC_TEMPLATE = 'This text is about {}.'
+
+TOPICS_MODEL_NAME = os.environ.get('TEXT_ANALYSIS_TOPICS_MODEL', DEFAULT_MODEL_NAME)
+
+# Quantos tópicos são devolvidos por texto
+DEFAULT_TOP_K = int(os.environ.get('TEXT_ANALYSIS_TOPICS_TOP_K', 3))
+
+# Quantas listas de tópicos codificadas ficam guardadas
+TOPIC_CACHE_SIZE = 16
+
+_topic_embeddings = OrderedDict()
+_topic_lock = threading.Lock()
+
+
+def topics_hash(topics, model_name=TOPICS_MODEL_NAME):
+    content = json.dumps([model_name, TOPIC_TEMPLATE, list(topics)], ensure_ascii=False)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+# Embeddings (um por linha) da lista de tópicos, codificados uma única vez por hash da lista
+def topic_embeddings(topics, model_name=TOPICS_MODEL_NAME):
+    digest = topics_hash(topics, model_name)
+    with _topic_lock:
+        embeddings = _topic_embeddings.get(digest)
+        if embeddings is not None:
+            _topic_embeddings.move_to_end(digest)
+            return embeddings
+
+    embeddings = encode([TOPIC_TEMPLATE.format(topic) for topic in topics], model_name=model_name)
+    with _topic_lock:
+        _topic_embeddings[digest] = embeddings
+        while len(_topic_embeddings) > TOPIC_CACHE_SIZE:
+            _topic_embeddings.popitem(last=False)
+    return embeddings
+
+
+# Top-k tópicos de cada texto, do mais para o menos similar: [[(tópico, score), ...], ...]
+def top_topics(texts, topics=None, top_k=DEFAULT_TOP_K, batch_size=32, model_name=TOPICS_MODEL_NAME):
+    topics = list(topics) if topics else DEFAULT_TOPICS
+    if len(texts) == 0:
+        return []
+
+    similarities = encode(texts, batch_size=batch_size, model_name=model_name) @ topic_embeddings(topics, model_name).T
+    top_k = max(1, min(top_k, len(topics)))
+
+    # argpartition separa os k maiores de cada linha; só eles são ordenados
+    if top_k < len(topics):
+        indices = np.argpartition(-similarities, top_k - 1, axis=1)[:, :top_k]
+    else:
+        indices = np.tile(np.arange(len(topics)), (len(similarities), 1))
+    scores = np.take_along_axis(similarities, indices, axis=1)
+    order = np.argsort(-scores, axis=1, kind='stable')
+    indices = np.take_along_axis(indices, order, axis=1)
+    scores = np.take_along_axis(scores, order, axis=1)
+
+    return [
+        [(topics[index], float(score)) for index, score in zip(row_indices, row_scores)]
+        for row_indices, row_scores in zip(indices, scores)
+    ]
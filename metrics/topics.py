@@ -1,13 +1,30 @@
-from langkit import topics
+from metrics.base import BatchAnalyzer
+from metrics.topic_engine import DEFAULT_TOP_K, TOPICS_MODEL_NAME, top_topics
 
 # Defina a classe TopicsAnalyzer
-class TopicsAnalyzer:
+class TopicsAnalyzer(BatchAnalyzer):
+    name = 'topics'
+    cache_version = 2
+
     def __init__(self):
         pass
 
-    def analyze(self, data, topics_list=None):
-        if topics_list is not None:
-            topics.init(topics=topics_list)
-        data['prompt_topics'] = data['prompt'].apply(lambda x: topics.closest_topic(x))
-        data['response_topics'] = data['response'].apply(lambda x: topics.closest_topic(x))
-        return data
\ No newline at end of file
+    def cache_config(self):
+        return TOPICS_MODEL_NAME
+
+    # A lista de tópicos e o top_k chegam como argumentos, então entram no namespace do cache
+    def _analyze_chunk(self, texts, topics_list=None, top_k=DEFAULT_TOP_K):
+        results = top_topics(texts, topics_list, top_k=top_k, batch_size=len(texts))
+        return [[{'topic': topic, 'score': score} for topic, score in ranking] for ranking in results]
+
+    def analyze(self, data, topics_list=None, batch_size=None, top_k=DEFAULT_TOP_K):
+        topics_list = list(topics_list) if topics_list else None
+        # Prompts e respostas são codificados como um único fluxo de textos
+        texts = list(data['prompt']) + list(data['response'])
+        rankings = self.analyze_batch(texts, batch_size=batch_size, topics_list=topics_list, top_k=top_k)
+        prompt_rankings, response_rankings = rankings[:len(data)], rankings[len(data):]
+        data['prompt_topics'] = [ranking[0]['topic'] for ranking in prompt_rankings]
+        data['response_topics'] = [ranking[0]['topic'] for ranking in response_rankings]
+        data['prompt_topic_scores'] = prompt_rankings
+        data['response_topic_scores'] = response_rankings
+        return data
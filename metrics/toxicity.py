@@ -1,11 +1,30 @@
-from langkit import toxicity
+from transformers import AutoModelForSequenceClassification, AutoTokenizer, TextClassificationPipeline
+
+from metrics.base import BatchAnalyzer
+
+# Mesmo modelo usado pelo langkit.toxicity
+TOXICITY_MODEL_PATH = "martin-ha/toxic-comment-model"
 
 # Defina a classe ToxicityAnalyzer
-class ToxicityAnalyzer:
-    def __init__(self):
-        pass
-
-    def analyze(self, data):
-        data['prompt_toxicity'] = data['prompt'].apply(toxicity.toxicity)
-        data['response_toxicity'] = data['response'].apply(toxicity.toxicity)
-        return data
\ No newline at end of file
+class ToxicityAnalyzer(BatchAnalyzer):
+    name = 'toxicity'
+
+    def __init__(self, model_path=TOXICITY_MODEL_PATH):
+        self.model_path = model_path
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        model = AutoModelForSequenceClassification.from_pretrained(model_path)
+        self.pipeline = TextClassificationPipeline(model=model, tokenizer=self.tokenizer)
+
+    def cache_config(self):
+        return self.model_path
+
+    def _analyze_chunk(self, texts):
+        # Um único forward pass por bloco, com a mesma conversão de score do langkit.toxicity.toxicity
+        texts = [text if isinstance(text, str) else '' for text in texts]
+        results = self.pipeline(texts, truncation=True, max_length=self.tokenizer.model_max_length, batch_size=len(texts))
+        return [result['score'] if result['label'] == 'toxic' else 1 - result['score'] for result in results]
+
+    def analyze(self, data, batch_size=None):
+        data['prompt_toxicity'] = self.analyze_batch(data['prompt'], batch_size=batch_size)
+        data['response_toxicity'] = self.analyze_batch(data['response'], batch_size=batch_size)
+        return data
@@ -0,0 +1,79 @@
+import pandas as pd
+
+from metrics.embeddings import get_store
+from metrics.parallel import analyze_chunk, map_chunks, resolve_mode
+from metrics.registry import ANALYZERS
+
+# Pipeline "analisar tudo": cada bloco de linhas é lido uma única vez e passa por todos os
+# analisadores selecionados em sequência, acumulando as colunas de resultado em uma só tabela.
+# Antes dos analisadores, os textos do bloco são normalizados uma vez e, se algum analisador de
+# similaridade foi selecionado, prompts e respostas são codificados juntos em um único lote no
+# armazém de embeddings, de onde refusal, prompt e topics leem os vetores.
+
+# Analisadores que leem os embeddings do modelo de similaridade e as colunas que cada um codifica
+EMBEDDING_ANALYZERS = {
+    'prompt': ('prompt',),
+    'refusal': ('response',),
+    'topics': ('prompt', 'response')
+}
+
+TEXT_COLUMNS = ('prompt', 'response')
+
+
+# Valores ausentes viram '' (como já fazem toxicity e similarity) e os demais viram str, para que
+# todos os analisadores, e o cache de resultados, que só aceita strings, vejam os mesmos textos
+def normalize_texts(chunk):
+    for column in TEXT_COLUMNS:
+        if column in chunk.columns:
+            chunk[column] = [
+                value if isinstance(value, str) else '' if value is None or pd.isna(value) else str(value)
+                for value in chunk[column]
+            ]
+    return chunk
+
+
+def share_embeddings(chunk, names, batch_size=None):
+    # Importado só aqui: o modelo de embeddings não é carregado quando nenhum analisador o usa
+    from metrics.similarity import DEFAULT_MODEL_NAME, encode
+    from metrics.topic_engine import TOPICS_MODEL_NAME
+
+    # Com um modelo próprio (TEXT_ANALYSIS_TOPICS_MODEL), os tópicos não compartilham a codificação
+    if TOPICS_MODEL_NAME != DEFAULT_MODEL_NAME:
+        names = [name for name in names if name != 'topics']
+    columns = {column for name in names for column in EMBEDDING_ANALYZERS.get(name, ())}
+    if not columns:
+        return
+    if get_store(DEFAULT_MODEL_NAME) is None:
+        return
+    texts = [text for column in TEXT_COLUMNS if column in columns and column in chunk.columns for text in chunk[column]]
+    if texts:
+        encode(texts, batch_size=batch_size or 32)
+
+
+# Executado por bloco (em thread ou processo): preparação compartilhada e depois cada analisador.
+# Os analisadores recebem uma cópia com os textos normalizados; a saída mantém as colunas originais.
+def analyze_all(chunk, names, batch_size=None, kwargs_by_name=None):
+    originals = {column: chunk[column] for column in TEXT_COLUMNS if column in chunk.columns}
+    normalized = normalize_texts(chunk.copy())
+    share_embeddings(normalized, names, batch_size)
+    result = analyze_chunk(normalized, names, batch_size, kwargs_by_name)
+    for column, values in originals.items():
+        result[column] = values
+    return result
+
+
+# Roda os analisadores (todos, por padrão) sobre um iterável de blocos e devolve os blocos de
+# resultado combinados, na ordem original
+def run_pipeline(chunks, names=None, batch_size=None, kwargs_by_name=None, workers=1, mode='auto', executor=None):
+    names = list(names or ANALYZERS)
+    mode = resolve_mode(mode, names, workers)
+    return map_chunks(chunks, names, batch_size, kwargs_by_name, workers=workers, mode=mode, executor=executor, function=analyze_all)
+
+
+# Adaptador para o JobManager, que espera um objeto com analyze(chunk)
+class Pipeline:
+    def __init__(self, names=None):
+        self.names = tuple(names or ANALYZERS)
+
+    def analyze(self, data, batch_size=None, kwargs_by_name=None):
+        return analyze_all(data, self.names, batch_size, kwargs_by_name)
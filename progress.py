@@ -0,0 +1,162 @@
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+
+# Progresso de um job de análise: linhas feitas, vazão (linhas/s) com média móvel exponencial e ETA.
+# Cada job tem o próprio rastreador, então sessões e abas simultâneas não interferem entre si.
+# O estado também é gravado de forma atômica (arquivo temporário + os.replace) em um JSON por job,
+# para que qualquer worker do servidor (ex.: vários processos do gunicorn) consiga responder pelo
+# progresso de um job iniciado em outro.
+DEFAULT_PROGRESS_DIR = os.environ.get(
+    'TEXT_ANALYSIS_PROGRESS_DIR',
+    os.path.join(tempfile.gettempdir(), 'text-analysis-progress')
+)
+
+# Constante de tempo (em segundos) da média móvel: amostras mais antigas que isso pesam cada vez menos
+EWMA_TIME_CONSTANT = float(os.environ.get('TEXT_ANALYSIS_PROGRESS_TIME_CONSTANT', 10.0))
+
+# Intervalo mínimo entre gravações do arquivo enquanto o job avança; mudanças de status gravam sempre
+WRITE_INTERVAL = 0.5
+
+
+def _progress_path(directory, job_id):
+    return os.path.join(directory, f'{job_id}.json')
+
+
+def _json_or_none(value):
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return None
+
+
+class ProgressTracker:
+    def __init__(self, job_id, name, total, directory=DEFAULT_PROGRESS_DIR, time_constant=EWMA_TIME_CONSTANT):
+        self.id = job_id
+        self.name = name
+        self.total = total
+        self.directory = directory
+        self.time_constant = time_constant
+        self.done = 0
+        self.status = 'pending'
+        self.error = None
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.rate = None
+        self._last_sample = None
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+        self._write(force=True)
+
+    def start(self):
+        with self._lock:
+            self.status = 'running'
+            self.started_at = time.time()
+            self._last_sample = time.perf_counter()
+        self._write(force=True)
+
+    # Atualiza a vazão com o bloco concluído. O peso da nova amostra depende do tempo desde a
+    # anterior (1 - e^(-dt/τ)), então blocos rápidos e lentos contribuem na proporção certa.
+    def advance(self, n_rows):
+        with self._lock:
+            self.done += n_rows
+            now = time.perf_counter()
+            elapsed = now - self._last_sample if self._last_sample is not None else 0.0
+            if elapsed > 0:
+                sample = n_rows / elapsed
+                if self.rate is None:
+                    self.rate = sample
+                else:
+                    weight = 1 - math.exp(-elapsed / self.time_constant)
+                    self.rate += weight * (sample - self.rate)
+                self._last_sample = now
+        self._write()
+
+    def finish(self, result=None):
+        with self._lock:
+            self.result = result
+            self.done = self.total
+            self.status = 'finished'
+            self.finished_at = time.time()
+        self._write(force=True)
+
+    def fail(self, error):
+        with self._lock:
+            self.error = error
+            self.status = 'failed'
+            self.finished_at = time.time()
+        self._write(force=True)
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self):
+        elapsed = 0.0
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+
+        eta = None
+        if self.status == 'running' and self.rate:
+            eta = max(self.total - self.done, 0) / self.rate
+
+        percent = (self.done / self.total) * 100 if self.total else 100.0
+        return {
+            'id': self.id,
+            'name': self.name,
+            'status': self.status,
+            'done': self.done,
+            'total': self.total,
+            'percent': percent,
+            'elapsed': elapsed,
+            'rows_per_second': self.rate,
+            'average_rows_per_second': self.done / elapsed if elapsed > 0 else None,
+            'eta': eta,
+            'error': self.error
+        }
+
+    def _write(self, force=False):
+        with self._lock:
+            now = time.time()
+            if not force and now - self._last_write < WRITE_INTERVAL:
+                return
+            self._last_write = now
+            state = dict(self._snapshot(), result=_json_or_none(self.result), updated_at=now)
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f'.{self.id}.', suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, _progress_path(self.directory, self.id))
+        except OSError as e:
+            print(f"Could not write progress of job {self.id}: {str(e)}")
+
+
+# Estado gravado de um job (de qualquer processo), com o handle do resultado quando serializável
+def read_progress(job_id, directory=DEFAULT_PROGRESS_DIR):
+    try:
+        with open(_progress_path(directory, job_id)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# Remove os arquivos de jobs sem atualização há mais de ttl segundos
+def prune_progress(ttl, directory=DEFAULT_PROGRESS_DIR):
+    if not os.path.isdir(directory):
+        return
+    now = time.time()
+    for filename in os.listdir(directory):
+        path = os.path.join(directory, filename)
+        try:
+            if now - os.path.getmtime(path) > ttl:
+                os.remove(path)
+        except OSError:
+            pass
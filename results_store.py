@@ -0,0 +1,163 @@
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Diretório onde ficam os datasets carregados e os resultados de cada análise
+DEFAULT_STORE_DIR = os.environ.get('TEXT_ANALYSIS_STORE_DIR', os.path.join(tempfile.gettempdir(), 'text-analysis-store'))
+
+# Datasets sem acesso há mais tempo que isso (em segundos) são removidos do disco
+DATASET_TTL = 24 * 3600
+
+# Quantidade de linhas por arquivo de parte ao gravar dados em blocos
+DEFAULT_PART_ROWS = 10000
+
+
+# Valor de uma coluna de texto/objeto lida do Parquet: arrays viram listas e nulos viram None
+def _restore_value(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return value
+
+
+# Armazena os DataFrames no servidor em formato colunar (Parquet, com pickle como alternativa
+# para colunas que o Arrow não consegue representar). Cada entrada é um diretório com partes
+# numeradas, o que permite gravar e ler datasets em blocos sem materializá-los inteiros.
+# Os componentes dcc.Store guardam apenas o handle retornado por put/put_chunks.
+class ResultStore:
+    def __init__(self, base_dir=DEFAULT_STORE_DIR, cache_size=16):
+        self.base_dir = base_dir
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    def new_dataset_id(self):
+        self._prune()
+        return uuid.uuid4().hex
+
+    def _dataset_dir(self, dataset_id):
+        return os.path.join(self.base_dir, dataset_id)
+
+    def _entry_dir(self, dataset_id, name):
+        return os.path.join(self._dataset_dir(dataset_id), name)
+
+    def _write_part(self, directory, index, df):
+        df = df.reset_index(drop=True)
+        path = os.path.join(directory, f"part-{index:05d}.parquet")
+        try:
+            df.to_parquet(path, index=False)
+        except Exception:
+            # Colunas com tipos mistos que o Arrow não representa vão para pickle
+            if os.path.exists(path):
+                os.remove(path)
+            with open(os.path.join(directory, f"part-{index:05d}.pkl"), 'wb') as f:
+                pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _read_part(self, path):
+        if path.endswith('.parquet'):
+            df = pd.read_parquet(path)
+            # O Arrow devolve listas como arrays NumPy; os callbacks de exibição esperam listas.
+            # Colunas de texto voltam como str com NaN nos nulos (pandas 3); os callbacks comparam
+            # com None, então elas voltam a ser object com None
+            for col in df.columns:
+                if df[col].dtype == object or pd.api.types.is_string_dtype(df[col].dtype):
+                    df[col] = pd.Series([_restore_value(value) for value in df[col].astype(object)], index=df.index, dtype=object)
+            return df
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    # Grava um iterável de DataFrames, agrupando os blocos em partes de até part_rows linhas
+    def put_chunks(self, dataset_id, name, chunks, part_rows=DEFAULT_PART_ROWS):
+        target = self._entry_dir(dataset_id, name)
+        tmp_dir = f"{target}.{uuid.uuid4().hex}.tmp"
+        os.makedirs(tmp_dir)
+
+        rows = 0
+        parts = 0
+        buffer = []
+        buffered = 0
+        try:
+            for chunk in chunks:
+                buffer.append(chunk)
+                buffered += len(chunk)
+                if buffered >= part_rows:
+                    self._write_part(tmp_dir, parts, pd.concat(buffer))
+                    parts += 1
+                    rows += buffered
+                    buffer = []
+                    buffered = 0
+            if buffer or parts == 0:
+                self._write_part(tmp_dir, parts, pd.concat(buffer) if buffer else pd.DataFrame())
+                parts += 1
+                rows += buffered
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        # Publica a nova versão de forma atômica, substituindo a anterior se existir
+        old_dir = None
+        if os.path.exists(target):
+            old_dir = f"{target}.{uuid.uuid4().hex}.old"
+            os.replace(target, old_dir)
+        os.replace(tmp_dir, target)
+        if old_dir is not None:
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+        with self._lock:
+            self._cache.pop((dataset_id, name), None)
+
+        return {'dataset': dataset_id, 'name': name, 'rows': rows, 'parts': parts, 'version': uuid.uuid4().hex, 'created_at': time.time()}
+
+    def put(self, dataset_id, name, df):
+        handle = self.put_chunks(dataset_id, name, [df], part_rows=max(len(df), 1))
+        self._remember(handle, df.reset_index(drop=True))
+        return handle
+
+    def _remember(self, handle, df):
+        with self._lock:
+            key = (handle['dataset'], handle['name'])
+            self._cache[key] = (handle.get('version'), df)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # Lê uma entrada parte por parte, sem carregar o dataset inteiro
+    def iter_chunks(self, handle):
+        directory = self._entry_dir(handle['dataset'], handle['name'])
+        if not os.path.isdir(directory):
+            raise KeyError(f"No stored data for {handle['dataset']}/{handle['name']}")
+        os.utime(self._dataset_dir(handle['dataset']))
+        for filename in sorted(os.listdir(directory)):
+            yield self._read_part(os.path.join(directory, filename))
+
+    def get(self, handle):
+        key = (handle['dataset'], handle['name'])
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == handle.get('version'):
+                self._cache.move_to_end(key)
+                return cached[1].copy()
+
+        df = pd.concat(list(self.iter_chunks(handle)), ignore_index=True)
+        self._remember(handle, df)
+        return df.copy()
+
+    def _prune(self):
+        now = time.time()
+        for dataset_id in os.listdir(self.base_dir):
+            path = self._dataset_dir(dataset_id)
+            try:
+                if os.path.isdir(path) and now - os.path.getmtime(path) > DATASET_TTL:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
@@ -0,0 +1,101 @@
+import random
+import re
+
+from metrics.pattern_engine import PatternSet, load_pattern_groups
+
+# O PatternSet (pré-filtro por átomos obrigatórios e lookahead de primeiro caractere) tem de dar as
+# mesmas respostas que a busca direta de cada expressão com o re, como no langkit.regexes
+
+PATTERN_FILE = 'pattern_groups.json'
+
+FRAGMENTS = [
+    'my', 'number', 'is', 'call', 'me', 'at', 'Rua', 'Av.', 'Avenida', 'Praça', 'das', 'Flores', 'São', 'João',
+    'Street', 'St', 'Road', 'Ave', 'Blvd', 'NW', 'N.', 'Main', 'Oak', 'email', 'contact', '@', '.com', '.br',
+    'john.doe', "o'brien+tag", 'example', 'CPF', 'CNPJ', 'CEP', 'SSN', 'card', '(', ')', '+', '-', '/', '.', ',',
+    'ção', 'Ünïcödé', '\n', '\t'
+]
+SEPARATORS = ['', '', ' ', '-', '.', '/', '  ']
+
+
+def random_digits(rng):
+    groups = [''.join(rng.choice('0123456789') for _ in range(rng.choice([1, 2, 3, 4, 4, 5, 6, 9, 10, 11, 15, 16])))]
+    for _ in range(rng.choice([0, 0, 1, 2, 3, 4])):
+        groups.append(rng.choice(SEPARATORS))
+        groups.append(''.join(rng.choice('0123456789') for _ in range(rng.choice([2, 3, 4, 4, 5, 6]))))
+    prefix = rng.choice(['', '', '', '+1 ', '(', '+55 ', '('])
+    return prefix + ''.join(groups)
+
+
+def fuzzed_texts(n, seed=0):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n):
+        parts = []
+        for _ in range(rng.randint(1, 25)):
+            parts.append(random_digits(rng) if rng.random() < 0.35 else rng.choice(FRAGMENTS))
+        texts.append(''.join(part + rng.choice([' ', ' ', '', ', ']) for part in parts))
+    return texts
+
+
+SAMPLE_TEXTS = [
+    '',
+    'no sensitive data here',
+    'My SSN is 123-45-6789.',
+    'Invalid SSN 666-12-3456 and 123-00-4567',
+    'Card 4111 1111 1111 1111 expires soon',
+    'Call (212) 555-0187 or +1 212.555.0187',
+    'Ligue para (11) 98765-4321 ou 4002-8922',
+    '42 NW 5th Street and 1600 Pennsylvania Avenue',
+    'mail john.doe@example.com today',
+    'CPF 123.456.789-09, CNPJ 12.345.678/0001-95, CEP 01310-100',
+    'Rua das Flores, 123 e Avenida Paulista, 1578',
+    '1234567890',
+]
+
+
+def reference_first_match(groups, text):
+    for group in groups:
+        for expression in group['expressions']:
+            if re.search(expression, text):
+                return group['name']
+    return None
+
+
+def reference_find_all(groups, text):
+    names = [group['name'] for group in groups]
+    matches = [
+        {'name': group['name'], 'start': match.start(), 'end': match.end(), 'text': match.group(0)}
+        for group in groups
+        for expression in group['expressions']
+        for match in re.finditer(expression, text)
+    ]
+    matches.sort(key=lambda item: (names.index(item['name']), item['start'], item['end']))
+    return matches
+
+
+def test_first_match_and_find_all_match_re():
+    groups = load_pattern_groups(PATTERN_FILE)
+    # Sem orçamento de tempo, para que o resultado não dependa da carga da máquina
+    patterns = PatternSet(groups, time_budget=0)
+    texts = SAMPLE_TEXTS + fuzzed_texts(5000)
+
+    first_mismatches = [
+        (text, patterns.first_match(text), reference_first_match(groups, text))
+        for text in texts
+        if patterns.first_match(text) != reference_first_match(groups, text)
+    ]
+    assert first_mismatches[:5] == []
+
+    all_mismatches = [text for text in texts if patterns.find_all(text) != reference_find_all(groups, text)]
+    assert all_mismatches[:5] == []
+
+    # O fuzzing tem de exercitar os grupos, e não só textos sem ocorrência
+    found = {reference_first_match(groups, text) for text in texts}
+    assert len(found - {None}) >= len(groups) // 2
+
+
+def test_non_text_values_have_no_match():
+    patterns = PatternSet(load_pattern_groups(PATTERN_FILE), time_budget=0)
+    for value in (float('nan'), None, 12345678909):
+        assert patterns.first_match(value) is None
+        assert patterns.find_all(value) == []
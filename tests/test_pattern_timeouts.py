@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip('regex')
+
+from metrics import cache
+from metrics.pattern_engine import TIMED_OUT
+from metrics.patterns import RegexAnalyzer
+
+# Uma busca interrompida pelo orçamento de tempo não é "nenhum padrão" e não pode ir para o cache
+
+SLOW_TEXT = 'x ' + '1' * 200000
+
+
+@pytest.fixture
+def result_cache(tmp_path):
+    previous = cache.settings()
+    cache.configure(path=str(tmp_path / 'results.sqlite'))
+    yield cache.get_cache()
+    cache.configure(**previous)
+
+
+def test_timed_out_result_is_marked_and_not_cached(result_cache, monkeypatch):
+    analyzer = RegexAnalyzer()
+    patterns = analyzer.pattern_file.current()[1]
+
+    monkeypatch.setattr(patterns, 'time_budget', 0.01)
+    assert analyzer.analyze_batch([SLOW_TEXT]) == [TIMED_OUT]
+    assert analyzer.analyze_batch([SLOW_TEXT]) == [TIMED_OUT]
+    assert result_cache.stats()['entries'] == 0
+
+    monkeypatch.setattr(patterns, 'time_budget', 0)
+    assert analyzer.analyze_batch([SLOW_TEXT]) == ['phone number - US']
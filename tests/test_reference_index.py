@@ -0,0 +1,23 @@
+import numpy as np
+
+from metrics.reference_index import ExactIndex, IVFIndex
+
+# O IVF tem de funcionar com conjuntos menores que o número de grupos pedido. Quando os grupos
+# visitados cobrem todos eles, o resultado é o mesmo da busca exata.
+
+
+def normalized(rng, n, dimension=16):
+    vectors = rng.normal(size=(n, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_ivf_on_tiny_sets_matches_exact():
+    rng = np.random.default_rng(0)
+    queries = normalized(rng, 20)
+    for n in (1, 2, 3, 8):
+        vectors = normalized(rng, n)
+        for n_lists in (None, 50):
+            index = IVFIndex(vectors, n_lists=n_lists)
+            assert len(index.centroids) <= n
+            assert index.nprobe == len(index.centroids)
+            np.testing.assert_allclose(index.max_similarity(queries), ExactIndex(vectors).max_similarity(queries), rtol=1e-5)
@@ -0,0 +1,78 @@
+import math
+import random
+
+import pytest
+
+pytest.importorskip('textstat')
+
+from metrics import textstat_engine
+from metrics.textstat import TextStatAnalyzer
+from metrics.textstat_engine import METRIC_NAMES
+
+# A passada única do textstat_engine tem de produzir exatamente as métricas das funções do textstat
+
+WORDS = [
+    'a', 'I', 'the', 'cat', 'sat', 'on', 'mat', 'reading', 'difficult', 'comprehension', 'extraordinary',
+    'unbelievably', 'photosynthesis', 'e-mail', "don't", "it's", 'rock-and-roll', 'naïve', 'café', 'über',
+    'co-operate', 'U.S.', 'Dr.', 'etc.', '42', '3.14', '1,000', 'x', 'queue', 'rhythm', 'beautiful',
+    'responsibility', 'internationalization', 'the', 'and', 'of', 'to', 'in', 'is', 'you', 'that', 'it',
+    'create', 'science', 'idea', 'poem', 'every', 'family', 'business', 'Wednesday', 'colonel', 'hello',
+    'AI', 'LLM', 'GPT-4', 'https://example.com', 'john.doe@example.com', '#tag', '@user', '—', '...', '"quoted"'
+]
+PUNCTUATION = ['.', '.', '.', '!', '?', ';', ',', ':', '...', '?!', '']
+
+SAMPLE_TEXTS = [
+    "Hello, how are you today?",
+    "The quick brown fox jumps over the lazy dog.",
+    "I'm sorry, but I can't help with that request.",
+    "Playing games has always been thought to be important to the development of well-balanced and creative children.",
+    "Mr. Smith went to Washington. He arrived on Jan. 5th! Did he stay? No.",
+    "a",
+    ".",
+    "   ",
+    "1234 5678",
+    "Supercalifragilisticexpialidocious.",
+    "One. Two. Three. Four. Five. Six. Seven. Eight. Nine. Ten. Eleven. Twelve. Thirteen. Fourteen. Fifteen. "
+    "Sixteen. Seventeen. Eighteen. Nineteen. Twenty. Twenty-one. Twenty-two. Twenty-three. Twenty-four. "
+    "Twenty-five. Twenty-six. Twenty-seven. Twenty-eight. Twenty-nine. Thirty. Thirty-one.",
+    "Line one\nline two\n\nline three without a period",
+]
+
+
+def fuzzed_texts(n, seed=0):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n):
+        sentences = []
+        for _ in range(rng.choice([1, 1, 2, 3, 5, 12, 35])):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(1, 40))]
+            if rng.random() < 0.5:
+                words[0] = words[0].capitalize()
+            sentences.append(' '.join(words) + rng.choice(PUNCTUATION))
+        separator = rng.choice([' ', ' ', '  ', '\n', ''])
+        texts.append(separator.join(sentences))
+    return texts
+
+
+def same(left, right):
+    if isinstance(left, float) and isinstance(right, float) and math.isnan(left) and math.isnan(right):
+        return True
+    return left == right and type(left) is type(right)
+
+
+@pytest.mark.skipif(not textstat_engine.AVAILABLE, reason='textstat version not supported by textstat_engine')
+def test_single_pass_matches_textstat(monkeypatch):
+    analyzer = TextStatAnalyzer()
+    texts = SAMPLE_TEXTS + fuzzed_texts(3000)
+
+    fast = [analyzer.analyze_text(text) for text in texts]
+    monkeypatch.setattr(textstat_engine, 'AVAILABLE', False)
+    reference = [analyzer.analyze_text(text) for text in texts]
+
+    mismatches = [
+        (text, name, fast_row[name], reference_row[name])
+        for text, fast_row, reference_row in zip(texts, fast, reference)
+        for name in METRIC_NAMES
+        if not same(fast_row[name], reference_row[name])
+    ]
+    assert mismatches[:5] == []